@@ -0,0 +1,44 @@
+"""Benchmark the import time of leicacam.
+
+Run with ``uv run python benchmarks/import_time.py``.
+"""
+
+import statistics
+import subprocess
+import sys
+
+RUNS = 20
+STATEMENTS = (
+    "import leicacam",
+    "from leicacam import CAM",
+    "from leicacam import AsyncCAM",
+)
+
+
+def import_time(statement: str) -> float:
+    """Return the cumulative import time in ms of statement."""
+    result = subprocess.run(  # noqa: S603
+        [sys.executable, "-X", "importtime", "-c", statement],
+        capture_output=True,
+        check=True,
+        text=True,
+    )
+    # each line is 'import time: self | cumulative | name' in microseconds,
+    # sum leicacam modules imported at top level, excluding interpreter startup
+    total = 0
+    for line in result.stderr.splitlines()[1:]:
+        _, cumulative, name = line.split("|")
+        if name.startswith(" leicacam"):
+            total += int(cumulative)
+    return total / 1000
+
+
+def main() -> None:
+    """Print the median import time of each statement."""
+    for statement in STATEMENTS:
+        times = [import_time(statement) for _ in range(RUNS)]
+        print(f"{statement:<32} {statistics.median(times):6.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
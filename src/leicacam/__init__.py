@@ -1,7 +1,61 @@
 """Control Leica microscopes with python."""
 
-from .async_cam import AsyncCAM
-from .cam import CAM
+from __future__ import annotations
 
-__all__ = ["CAM", "AsyncCAM"]
+import importlib
+
+# avoid importing typing at runtime to keep import fast
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from typing import Any
+
+    from .async_cam import AsyncCAM
+    from .cam import CAM
+    from .deadline import Deadline
+    from .eventlog import EventLog
+    from .progress import ProgressTracker
+    from .scheduler import CommandScheduler
+    from .settings import SettingsProfile
+    from .template import TemplateManager
+    from .threaded import ThreadedCAM
+
+# import submodules on first attribute access to keep import fast
+_LAZY_IMPORTS = {
+    "AsyncCAM": ".async_cam",
+    "CAM": ".cam",
+    "CommandScheduler": ".scheduler",
+    "Deadline": ".deadline",
+    "EventLog": ".eventlog",
+    "ProgressTracker": ".progress",
+    "SettingsProfile": ".settings",
+    "TemplateManager": ".template",
+    "ThreadedCAM": ".threaded",
+}
+
+__all__ = [
+    "CAM",
+    "AsyncCAM",
+    "CommandScheduler",
+    "Deadline",
+    "EventLog",
+    "ProgressTracker",
+    "SettingsProfile",
+    "TemplateManager",
+    "ThreadedCAM",
+]
 __version__ = "0.7.0"
+
+
+def __getattr__(name: str) -> Any:
+    """Import public classes from their submodule on first access."""
+    if name not in _LAZY_IMPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    module = importlib.import_module(_LAZY_IMPORTS[name], __name__)
+    value = getattr(module, name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    """Return the module attributes including the lazy imports."""
+    return sorted(set(globals()) | set(_LAZY_IMPORTS))
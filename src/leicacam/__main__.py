@@ -0,0 +1,8 @@
+"""Run the leicacam command line interface."""
+
+import sys
+
+from leicacam.cli import main
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,11 +4,24 @@ from __future__ import annotations
 
 import asyncio
 from collections import OrderedDict
-from typing import Any
+from collections.abc import Iterable, Mapping
+from time import monotonic
+from types import TracebackType
+from typing import Any, cast
 
-from async_timeout import timeout as async_timeout
-
-from leicacam.cam import BaseCAM, _parse_receive, check_messages
+from leicacam.cam import (
+    BaseCAM,
+    FieldKey,
+    _collect_replies,
+    _confirmed_jobs,
+    _parse_receive,
+    _prepare_jobs,
+    _reply_key,
+    check_messages,
+)
+from leicacam.deadline import Deadline, as_deadline
+from leicacam.session import RecordingStreamReader, RecordingStreamWriter
+from leicacam.settings import SettingsProfile
 
 
 class AsyncCAM(BaseCAM):
@@ -21,10 +34,46 @@ class AsyncCAM(BaseCAM):
         self.writer: asyncio.StreamWriter | None = None
         self.welcome_msg: bytes | None = None
 
+    async def __aenter__(self) -> AsyncCAM:
+        """Connect and return instance."""
+        await self.connect()
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_val: BaseException | None,
+        exc_tb: TracebackType | None,
+    ) -> None:
+        """Close stream and wait until it is closed."""
+        self.close()
+        await self.wait_closed()
+
     async def connect(self) -> None:
-        """Connect to LASAF through a CAM-socket."""
-        self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
-        self.welcome_msg = await self.reader.read(self.buffer_size)
+        """Connect to LASAF through a CAM-socket.
+
+        Raises TimeoutError if the connection or the welcome message takes
+        longer than ``connect_timeout`` seconds.
+        """
+        try:
+            async with asyncio.timeout(self.connect_timeout):
+                self.reader, self.writer = await asyncio.open_connection(
+                    self.host, self.port
+                )
+                self._configure_socket(self.writer.get_extra_info("socket"))
+                if self.recorder is not None:
+                    self.reader = cast(
+                        asyncio.StreamReader,
+                        RecordingStreamReader(self.reader, self.recorder),
+                    )
+                    self.writer = cast(
+                        asyncio.StreamWriter,
+                        RecordingStreamWriter(self.writer, self.recorder),
+                    )
+                self.welcome_msg = await self.reader.read(self.buffer_size)
+        except BaseException:
+            self.close()
+            raise
 
     async def send(self, commands: list[tuple[str, str]] | bytes) -> None:
         """Send commands to LASAF through CAM-socket.
@@ -57,6 +106,134 @@ class AsyncCAM(BaseCAM):
         self.writer.write(msg)
         await self.writer.drain()
 
+    async def send_batch(
+        self,
+        batch: list[list[tuple[str, str]]],
+        timeout: float = 60,
+        *,
+        deadline: Deadline | None = None,
+    ) -> list[OrderedDict[str, str]]:
+        """Send several commands in one write and wait for all replies.
+
+        Parameters
+        ----------
+        batch : list of lists of tuples
+            Commands as lists of tuples. cam.prefix is prepended to each
+            command.
+        timeout : int
+            Minutes to wait for all replies. Ignored if deadline is given.
+        deadline : leicacam.deadline.Deadline
+            Deadline to wait for all replies until.
+
+        Returns
+        -------
+        list of OrderedDict
+            Reply to each command in the same order as the commands. An empty
+            OrderedDict is returned for each reply not received before timeout.
+
+        """
+        if self.writer is None:
+            raise RuntimeError("Not connected to CAM server.")
+        if not batch:
+            return []
+        replies: list[OrderedDict[str, str]] = []
+        try:
+            async with as_deadline(timeout, deadline).timeout():
+                for chunk in self._batch_chunks(batch):
+                    await self._send_chunk(self.writer, chunk, replies)
+        except TimeoutError:
+            self._flow_timeout()
+        replies.extend(OrderedDict() for _ in batch[len(replies) :])
+        return replies
+
+    async def _send_chunk(
+        self,
+        writer: asyncio.StreamWriter,
+        chunk: list[list[tuple[str, str]]],
+        replies: list[OrderedDict[str, str]],
+    ) -> None:
+        """Send a chunk of a batch and append the replies to replies."""
+        expected = [_reply_key(commands) for commands in chunk]
+        sent_at = monotonic()
+        writer.write(self._prepare_batch(chunk))
+        await writer.drain()
+        chunk_replies: list[OrderedDict[str, str]] = []
+        try:
+            while len(chunk_replies) < len(expected):
+                received = len(chunk_replies)
+                _collect_replies(await self.receive(), expected, chunk_replies)
+                self._flow_replies(len(chunk_replies) - received, sent_at)
+        finally:
+            replies.extend(chunk_replies)
+
+    async def apply_settings(
+        self,
+        profile: SettingsProfile,
+        timeout: float = 60,
+        *,
+        deadline: Deadline | None = None,
+    ) -> list[OrderedDict[str, str]]:
+        """Apply a settings profile.
+
+        Only settings that differ from the last applied profile are sent,
+        pipelined in one batch. Settings that are not confirmed by LASAF
+        before timeout are sent again the next time a profile is applied.
+
+        Parameters
+        ----------
+        profile : leicacam.settings.SettingsProfile
+            Settings to apply.
+        timeout : int
+            Minutes to wait for all replies. Ignored if deadline is given.
+        deadline : leicacam.deadline.Deadline
+            Deadline to wait for all replies until.
+
+        Returns
+        -------
+        list of OrderedDict
+            Reply to each sent command.
+
+        """
+        previous, commands = self._prepare_settings(profile)
+        replies = await self.send_batch(commands, timeout=timeout, deadline=deadline)
+        self.settings_profile = previous.confirmed(commands, replies)
+        return replies
+
+    async def assign_jobs(
+        self,
+        assignments: Mapping[FieldKey, str],
+        slide: int = 0,
+        timeout: float = 60,
+        *,
+        deadline: Deadline | None = None,
+    ) -> dict[str, bool]:
+        """Assign jobs to scan fields.
+
+        Fields are grouped by job, so each job is one run of ``selectfield``
+        commands and one ``assignjob`` command. All commands are sent
+        pipelined in one batch.
+
+        Parameters
+        ----------
+        assignments : mapping
+            Job name for each field as (wellx, welly, fieldx, fieldy).
+        slide : int
+            Slide of the fields.
+        timeout : int
+            Minutes to wait for all replies. Ignored if deadline is given.
+        deadline : leicacam.deadline.Deadline
+            Deadline to wait for all replies until.
+
+        Returns
+        -------
+        dict
+            For each job, True if all its commands were confirmed.
+
+        """
+        fields_by_job, commands = _prepare_jobs(assignments, slide)
+        replies = await self.send_batch(commands, timeout=timeout, deadline=deadline)
+        return _confirmed_jobs(fields_by_job, replies)
+
     async def receive(self) -> list[OrderedDict[str, str]]:
         """Receive message from socket interface as list of OrderedDict."""
         if self.reader is None:
@@ -66,10 +243,15 @@ class AsyncCAM(BaseCAM):
         except OSError:
             return []
 
-        return _parse_receive(incoming)
+        return self._log_received(_parse_receive(incoming, self.decoder))
 
     async def wait_for(
-        self, cmd: str, value: str | None = None, timeout: float = 60
+        self,
+        cmd: str,
+        value: str | None = None,
+        timeout: float = 60,
+        *,
+        deadline: Deadline | None = None,
     ) -> OrderedDict[str, str]:
         """Hang until command is received.
 
@@ -84,7 +266,10 @@ class AsyncCAM(BaseCAM):
             Wait until ``cmd:value`` is received.
         timeout : int
             Minutes to wait for command. If timeout is reached, an empty
-            OrderedDict will be returned.
+            OrderedDict will be returned. Ignored if deadline is given.
+        deadline : leicacam.deadline.Deadline
+            Deadline to wait until. An empty OrderedDict will be returned
+            if the deadline is reached or cancelled.
 
         Returns
         -------
@@ -93,7 +278,7 @@ class AsyncCAM(BaseCAM):
 
         """
         try:
-            async with async_timeout(timeout * 60):
+            async with as_deadline(timeout, deadline).timeout():
                 while True:
                     msgs = await self.receive()
                     msg = check_messages(msgs, cmd, value=value)
@@ -109,3 +294,34 @@ class AsyncCAM(BaseCAM):
         if self.writer.can_write_eof():
             self.writer.write_eof()
         self.writer.close()
+
+    async def wait_closed(self) -> None:
+        """Wait until the stream is closed."""
+        if self.writer is None:
+            return
+        try:
+            await self.writer.wait_closed()
+        except ConnectionError:
+            pass
+        self.reader = self.writer = None
+
+
+async def connect_all(cams: Iterable[AsyncCAM]) -> list[BaseException | None]:
+    """Connect to several CAM servers in parallel.
+
+    Parameters
+    ----------
+    cams : iterable of AsyncCAM
+        Instances to connect.
+
+    Returns
+    -------
+    list
+        None for each connected instance or the exception raised when
+        connecting, eg TimeoutError for an unreachable host.
+
+    """
+    results = await asyncio.gather(
+        *(cam.connect() for cam in cams), return_exceptions=True
+    )
+    return [result if isinstance(result, BaseException) else None for result in results]
@@ -3,16 +3,25 @@
 from __future__ import annotations
 
 from collections import OrderedDict
-from collections.abc import Callable
+from collections.abc import Callable, Iterator, Mapping
 import functools
 import logging
 import os
-import platform
 import socket
-from time import sleep, time
-from typing import Any, cast
+import sys
+from time import monotonic
+from types import TracebackType
+from typing import TYPE_CHECKING, Any, cast
 
-import pydebug
+from leicacam.deadline import Deadline, as_deadline
+from leicacam.decoder import DEFAULT_DECODER, Decoder, split_pairs
+from leicacam.flow import FlowControl
+from leicacam.settings import SettingsProfile
+from leicacam.template import template_name
+
+if TYPE_CHECKING:
+    from leicacam.eventlog import EventLog
+    from leicacam.session import SessionRecorder
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -33,30 +42,71 @@ def logger[**P, R](function: Callable[P, R]) -> Callable[P, R]:
     return wrapper
 
 
-# debug with `DEBUG=leicacam python script.py`
-if platform.system() == "Windows":
-    # monkeypatch
-    @logger
-    def debug(msg: bytes | str) -> None:
-        """Debug on Windows."""
-        try:
-            dbg = os.environ["DEBUG"]
-            if dbg in ("leicacam", "*"):
-                print("leicacam " + str(msg))
-        except KeyError:
-            pass
+def _windows_debug(msg: bytes | str) -> None:
+    """Debug on Windows."""
+    try:
+        dbg = os.environ["DEBUG"]
+        if dbg in ("leicacam", "*"):
+            print("leicacam " + str(msg))
+    except KeyError:
+        pass
 
-else:
-    debug = logger(pydebug.debug("leicacam"))
+
+@functools.cache
+def _debug_backend() -> Callable[[bytes | str], None]:
+    """Return the debug backend, set up on first use to keep import fast."""
+    if sys.platform == "win32":
+        return _windows_debug
+    import pydebug
+
+    return cast(Callable[[bytes | str], None], pydebug.debug("leicacam"))
+
+
+# debug with `DEBUG=leicacam python script.py`
+@logger
+def debug(msg: bytes | str) -> None:
+    """Print debug message if enabled by the DEBUG environment variable."""
+    _debug_backend()(msg)
 
 
 class BaseCAM:
     """Base driver for LASAF Computer Assisted Microscopy."""
 
-    def __init__(self, host: str = "127.0.0.1", port: int = 8895) -> None:
-        """Set up instance."""
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 8895,
+        recorder: SessionRecorder | None = None,
+        *,
+        connect_timeout: float = 10,
+        tcp_nodelay: bool = False,
+        keepalive: bool = False,
+    ) -> None:
+        """Set up instance.
+
+        Parameters
+        ----------
+        host : str
+            Host of the CAM server.
+        port : int
+            Port of the CAM server.
+        recorder : leicacam.session.SessionRecorder
+            Optional recorder of bytes sent and received.
+        connect_timeout : float
+            Seconds to wait for the connection and the welcome message.
+        tcp_nodelay : bool
+            Disable Nagle's algorithm on the socket.
+        keepalive : bool
+            Enable TCP keepalive on the socket.
+
+        """
         self.host = host
         self.port = port
+        # record bytes sent and received, see leicacam.session
+        self.recorder = recorder
+        self.connect_timeout = connect_timeout
+        self.tcp_nodelay = tcp_nodelay
+        self.keepalive = keepalive
         # prefix for all commands
         self.prefix: list[tuple[str, str]] = [
             ("cli", "python-leicacam"),
@@ -65,6 +115,22 @@ class BaseCAM:
         self.prefix_bytes = b"/cli:python-leicacam /app:matrix "
         self.buffer_size = 1024
         self.delay = 0.1  # poll every 100ms when waiting for incoming
+        # last settings profile confirmed by LASAF
+        self.settings_profile: SettingsProfile | None = None
+        self.decoder = DEFAULT_DECODER
+        # split batches to an adaptive window, see leicacam.flow
+        self.flow_control: FlowControl | None = None
+        # append received messages to a columnar log, see leicacam.eventlog
+        self.event_log: EventLog | None = None
+
+    def _configure_socket(self, sock: socket.socket | None) -> None:
+        """Set the configured options on the socket."""
+        if sock is None:
+            return
+        if self.tcp_nodelay:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        if self.keepalive:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
 
     def _prepare_send(self, commands: list[tuple[str, str]] | bytes) -> bytes:
         """Prepare message to be sent.
@@ -88,14 +154,156 @@ class BaseCAM:
         debug(b"> " + msg)
         return msg
 
+    def _prepare_batch(self, batch: list[list[tuple[str, str]]]) -> bytes:
+        """Prepare several commands to be sent in one write.
+
+        Parameters
+        ----------
+        batch : list of lists of tuples
+            Commands as lists of tuples. cam.prefix is prepended to each
+            command.
+
+        Returns
+        -------
+        bytes
+            Messages separated by line endings.
+
+        """
+        return b"\r\n".join(self._prepare_send(commands) for commands in batch)
+
+    def _batch_chunks(
+        self, batch: list[list[tuple[str, str]]]
+    ) -> Iterator[list[list[tuple[str, str]]]]:
+        """Split a batch to chunks of the current flow control window."""
+        pos = 0
+        while pos < len(batch):
+            size = len(batch) if self.flow_control is None else self.flow_control.window
+            yield batch[pos : pos + size]
+            pos += size
+
+    def _flow_replies(self, count: int, sent_at: float) -> None:
+        """Report received replies to flow control."""
+        if self.flow_control is None:
+            return
+        latency = monotonic() - sent_at
+        for _ in range(count):
+            self.flow_control.on_reply(latency)
+
+    def _flow_timeout(self) -> None:
+        """Report missing replies to flow control."""
+        if self.flow_control is not None:
+            self.flow_control.on_timeout()
+
+    def _log_received(
+        self, msgs: list[OrderedDict[str, str]]
+    ) -> list[OrderedDict[str, str]]:
+        """Append received messages to the event log if set."""
+        if self.event_log is not None and msgs:
+            self.event_log.extend(msgs)
+        return msgs
+
+    def _prepare_settings(
+        self, profile: SettingsProfile
+    ) -> tuple[SettingsProfile, list[list[tuple[str, str]]]]:
+        """Return the last applied profile and the commands to apply profile."""
+        previous = self.settings_profile or SettingsProfile()
+        return previous, profile.diff(previous)
+
+
+FieldKey = tuple[int, int, int, int]
+
+
+def _prepare_jobs(
+    assignments: Mapping[FieldKey, str], slide: int
+) -> tuple[dict[str, list[FieldKey]], list[list[tuple[str, str]]]]:
+    """Return fields grouped by job and the commands to assign the jobs.
+
+    Each job deselects all fields, selects its fields and assigns the job.
+    """
+    fields_by_job: dict[str, list[FieldKey]] = {}
+    for field, job in assignments.items():
+        fields_by_job.setdefault(job, []).append(field)
+    commands: list[list[tuple[str, str]]] = []
+    for job, fields in fields_by_job.items():
+        commands.append([("cmd", "selectallfields"), ("value", "false")])
+        commands.extend(
+            [
+                ("cmd", "selectfield"),
+                ("slide", str(slide)),
+                ("wellx", str(wellx)),
+                ("welly", str(welly)),
+                ("fieldx", str(fieldx)),
+                ("fieldy", str(fieldy)),
+                ("value", "true"),
+            ]
+            for wellx, welly, fieldx, fieldy in fields
+        )
+        commands.append([("cmd", "assignjob"), ("job", job)])
+    return fields_by_job, commands
+
+
+def _confirmed_jobs(
+    fields_by_job: dict[str, list[FieldKey]], replies: list[OrderedDict[str, str]]
+) -> dict[str, bool]:
+    """Return if all commands of each job got a reply."""
+    confirmed = {}
+    start = 0
+    for job, fields in fields_by_job.items():
+        end = start + len(fields) + 2
+        confirmed[job] = all(replies[start:end])
+        start = end
+    return confirmed
+
+
+def _reply_key(commands: list[tuple[str, str]]) -> tuple[str, str]:
+    """Return the key and value that identify the reply to a command."""
+    for key, val in commands:
+        if key == "cmd":
+            return key, str(val)
+    key, val = commands[0]
+    return key, str(val)
+
+
+def _collect_replies(
+    msgs: list[OrderedDict[str, str]],
+    expected: list[tuple[str, str]],
+    replies: list[OrderedDict[str, str]],
+) -> None:
+    """Append received messages that match the next expected reply.
+
+    Replies are matched in the order the commands were sent.
+    """
+    for msg in msgs:
+        if len(replies) == len(expected):
+            return
+        key, value = expected[len(replies)]
+        if msg.get(key) == value:
+            replies.append(msg)
+
 
-def _parse_receive(incoming: bytes) -> list[OrderedDict[str, str]]:
+def _split_messages(incoming: bytes) -> list[bytes]:
+    """Split received bytes to messages on null bytes and line endings."""
+    # first split on terminating null byte
+    incoming_split = incoming.split(b"\x00")
+    msgs = []
+    for msg in incoming_split:
+        # then split on line ending
+        split_msg = msg.splitlines()
+        msgs.extend(split_msg)
+    return msgs
+
+
+def _parse_receive(
+    incoming: bytes, decoder: Decoder = DEFAULT_DECODER
+) -> list[OrderedDict[str, str]]:
     """Parse received response.
 
     Parameters
     ----------
     incoming : bytes string
         incoming bytes from socket server.
+    decoder : leicacam.decoder.Decoder
+        Decoder for keys and values.
 
     Returns
     -------
@@ -104,15 +312,8 @@ def _parse_receive(incoming: bytes) -> list[OrderedDict[str, str]]:
 
     """
     debug(b"< " + incoming)
-    # first split on terminating null byte
-    incoming_split = incoming.split(b"\x00")
-    msgs = []
-    for msg in incoming_split:
-        # then split on line ending
-        split_msg = msg.splitlines()
-        msgs.extend(split_msg)
     # return as list of several messages received
-    return [bytes_as_dict(msg) for msg in msgs]
+    return [bytes_as_dict(msg, decoder) for msg in _split_messages(incoming)]
 
 
 class CAM(BaseCAM):
@@ -123,13 +324,42 @@ class CAM(BaseCAM):
         super().__init__(*args, **kwargs)
         self.connect()
 
+    def __enter__(self) -> CAM:
+        """Return the connected instance."""
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_val: BaseException | None,
+        exc_tb: TracebackType | None,
+    ) -> None:
+        """Close the socket."""
+        self.close()
+
     def connect(self) -> None:
-        """Connect to LASAF through a CAM-socket."""
+        """Connect to LASAF through a CAM-socket.
+
+        Raises TimeoutError if the connection or the welcome message takes
+        longer than ``connect_timeout`` seconds.
+        """
         self.socket = socket.socket()
-        self.socket.connect((self.host, self.port))
+        if self.recorder is not None:
+            from leicacam.session import RecordingSocket
+
+            self.socket = cast(
+                socket.socket, RecordingSocket(self.socket, self.recorder)
+            )
+        self._configure_socket(self.socket)
+        self.socket.settimeout(self.connect_timeout)
+        try:
+            self.socket.connect((self.host, self.port))
+            # receive welcome message
+            self.welcome_msg = self.socket.recv(self.buffer_size)
+        except OSError:
+            self.socket.close()
+            raise
         self.socket.settimeout(False)  # non-blocking
-        sleep(self.delay)  # wait for response
-        self.welcome_msg = self.socket.recv(self.buffer_size)  # receive welcome message
 
     def flush(self) -> None:
         """Flush incoming socket messages."""
@@ -170,6 +400,75 @@ class CAM(BaseCAM):
         msg = self._prepare_send(commands)
         return self.socket.send(msg)
 
+    def send_batch(
+        self,
+        batch: list[list[tuple[str, str]]],
+        timeout: float = 60,
+        *,
+        deadline: Deadline | None = None,
+    ) -> list[OrderedDict[str, str]]:
+        """Send several commands in one write and wait for all replies.
+
+        Parameters
+        ----------
+        batch : list of lists of tuples
+            Commands as lists of tuples. cam.prefix is prepended to each
+            command.
+        timeout : int
+            Minutes to wait for all replies. Ignored if deadline is given.
+        deadline : leicacam.deadline.Deadline
+            Deadline to wait for all replies until.
+
+        Returns
+        -------
+        list of OrderedDict
+            Reply to each command in the same order as the commands. An empty
+            OrderedDict is returned for each reply not received before timeout.
+
+        Example
+        -------
+        ::
+
+            >>> cam.send_batch([
+            ...     [('cmd', 'enableall'), ('value', 'false')],
+            ...     [('cmd', 'startscan')],
+            ... ])
+
+        """
+        if not batch:
+            return []
+        self.flush()  # discard any waiting messages
+        replies: list[OrderedDict[str, str]] = []
+        deadline = as_deadline(timeout, deadline)
+        for chunk in self._batch_chunks(batch):
+            if replies and deadline.expired:
+                # do not send commands after timeout
+                break
+            replies.extend(self._send_chunk(chunk, deadline))
+        replies.extend(OrderedDict() for _ in batch[len(replies) :])
+        return replies
+
+    def _send_chunk(
+        self, chunk: list[list[tuple[str, str]]], deadline: Deadline
+    ) -> list[OrderedDict[str, str]]:
+        """Send a chunk of a batch and wait for the replies until deadline."""
+        expected = [_reply_key(commands) for commands in chunk]
+        sent_at = monotonic()
+        self.socket.sendall(self._prepare_batch(chunk))
+        replies: list[OrderedDict[str, str]] = []
+        while True:
+            received = len(replies)
+            _collect_replies(self.receive(), expected, replies)
+            self._flow_replies(len(replies) - received, sent_at)
+            if len(replies) == len(expected):
+                return replies
+            if deadline.expired:
+                break
+            deadline.sleep(self.delay)
+        self._flow_timeout()
+        replies.extend(OrderedDict() for _ in expected[len(replies) :])
+        return replies
+
     def receive(self) -> list[OrderedDict[str, str]]:
         """Receive message from socket interface as list of OrderedDict."""
         try:
@@ -177,10 +476,15 @@ class CAM(BaseCAM):
         except OSError:
             return []
 
-        return _parse_receive(incoming)
+        return self._log_received(_parse_receive(incoming, self.decoder))
 
     def wait_for(
-        self, cmd: str, value: str | None = None, timeout: float = 60
+        self,
+        cmd: str,
+        value: str | None = None,
+        timeout: float = 60,
+        *,
+        deadline: Deadline | None = None,
     ) -> OrderedDict[str, str]:
         """Hang until command is received.
 
@@ -195,7 +499,10 @@ class CAM(BaseCAM):
             Wait until ``cmd:value`` is received.
         timeout : int
             Minutes to wait for command. If timeout is reached, an empty
-            OrderedDict will be returned.
+            OrderedDict will be returned. Ignored if deadline is given.
+        deadline : leicacam.deadline.Deadline
+            Deadline to wait until. An empty OrderedDict will be returned
+            if the deadline is reached or cancelled.
 
         Returns
         -------
@@ -203,15 +510,15 @@ class CAM(BaseCAM):
             Last received message or empty message if timeout is reached.
 
         """
-        wait = time() + timeout * 60
+        deadline = as_deadline(timeout, deadline)
         while True:
-            if time() > wait:
+            if deadline.expired:
                 return OrderedDict()
             msgs = self.receive()
             msg = check_messages(msgs, cmd, value=value)
             if msg:
                 return msg
-            sleep(self.delay)
+            deadline.sleep(self.delay)
 
     def close(self) -> None:
         """Close the socket."""
@@ -338,12 +645,7 @@ class CAM(BaseCAM):
             >>> cam.load_template('/path/to/{ScanningTemplate}leicacam.xml')
 
         """
-        basename = os.path.basename(filename)
-        if basename[-4:] == ".xml":
-            basename = basename[:-4]
-        if basename[:18] != "{ScanningTemplate}":
-            basename = "{ScanningTemplate}" + basename
-        cmd = [("sys", "0"), ("cmd", "load"), ("fil", str(basename))]
+        cmd = [("sys", "0"), ("cmd", "load"), ("fil", template_name(filename))]
         self.send(cmd)
         return self.wait_for(*cmd[1])
 
@@ -353,6 +655,81 @@ class CAM(BaseCAM):
         self.send(cmd)
         return self.wait_for(*cmd[1])
 
+    def apply_settings(
+        self,
+        profile: SettingsProfile,
+        timeout: float = 60,
+        *,
+        deadline: Deadline | None = None,
+    ) -> list[OrderedDict[str, str]]:
+        """Apply a settings profile.
+
+        Only settings that differ from the last applied profile are sent,
+        pipelined in one batch. Settings that are not confirmed by LASAF
+        before timeout are sent again the next time a profile is applied.
+
+        Parameters
+        ----------
+        profile : leicacam.settings.SettingsProfile
+            Settings to apply.
+        timeout : int
+            Minutes to wait for all replies. Ignored if deadline is given.
+        deadline : leicacam.deadline.Deadline
+            Deadline to wait for all replies until.
+
+        Returns
+        -------
+        list of OrderedDict
+            Reply to each sent command.
+
+        """
+        previous, commands = self._prepare_settings(profile)
+        replies = self.send_batch(commands, timeout=timeout, deadline=deadline)
+        self.settings_profile = previous.confirmed(commands, replies)
+        return replies
+
+    def assign_jobs(
+        self,
+        assignments: Mapping[FieldKey, str],
+        slide: int = 0,
+        timeout: float = 60,
+        *,
+        deadline: Deadline | None = None,
+    ) -> dict[str, bool]:
+        """Assign jobs to scan fields.
+
+        Fields are grouped by job, so each job is one run of ``selectfield``
+        commands and one ``assignjob`` command. All commands are sent
+        pipelined in one batch.
+
+        Parameters
+        ----------
+        assignments : mapping
+            Job name for each field as (wellx, welly, fieldx, fieldy).
+        slide : int
+            Slide of the fields.
+        timeout : int
+            Minutes to wait for all replies. Ignored if deadline is given.
+        deadline : leicacam.deadline.Deadline
+            Deadline to wait for all replies until.
+
+        Returns
+        -------
+        dict
+            For each job, True if all its commands were confirmed.
+
+        Example
+        -------
+        ::
+
+            >>> cam.assign_jobs({(1, 1, 1, 1): 'Job1', (1, 1, 2, 1): 'Job2'})
+            {'Job1': True, 'Job2': True}
+
+        """
+        fields_by_job, commands = _prepare_jobs(assignments, slide)
+        replies = self.send_batch(commands, timeout=timeout, deadline=deadline)
+        return _confirmed_jobs(fields_by_job, replies)
+
 
 ##
 # Helper methods
@@ -416,13 +793,20 @@ def tuples_as_dict(_list: list[tuple[str, str]]) -> OrderedDict[str, str]:
     return _dict
 
 
-def bytes_as_dict(msg: bytes) -> OrderedDict[str, str]:
+def bytes_as_dict(
+    msg: bytes, decoder: Decoder = DEFAULT_DECODER
+) -> OrderedDict[str, str]:
     """Parse CAM message to OrderedDict based on format /key:val.
 
+    The message is split before decoding, so a value that is not valid in
+    the decoder encoding does not affect the other values.
+
     Parameters
     ----------
     msg : bytes
         Sequence of /key:val.
+    decoder : leicacam.decoder.Decoder
+        Decoder for keys and values. Defaults to UTF-8 with cp1252 fallback.
 
     Returns
     -------
@@ -430,20 +814,9 @@ def bytes_as_dict(msg: bytes) -> OrderedDict[str, str]:
         With /key:val => dict[key] = val.
 
     """
-    # decode bytes, assume '/' in start
-    cmd_strings = msg.decode()[1:].split(r" /")
     cmds = OrderedDict()
-    for cmd in cmd_strings:
-        unpacked = cmd.split(":")
-        # handle string not well formatted (ex filenames with c:\)
-        if len(unpacked) > 2:
-            key = unpacked[0]
-            val = ":".join(unpacked[1:])
-        elif len(unpacked) < 2:
-            continue
-        else:
-            key, val = unpacked
-        cmds[key] = val
+    for key, val in split_pairs(msg):
+        cmds[decoder.decode(key)] = decoder.decode(val)
     return cmds
 
 
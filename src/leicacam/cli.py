@@ -0,0 +1,214 @@
+"""Provide a command line interface to the CAM server.
+
+Commands are written as ``/key:val`` strings without the cam prefix, eg::
+
+    leicacam send "/cmd:getinfo /dev:stage"
+    leicacam run commands.txt
+    leicacam tail --filter relpath
+
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+from collections import OrderedDict
+import json
+import sys
+from time import monotonic, time
+from typing import TextIO
+
+from leicacam.async_cam import AsyncCAM
+from leicacam.cam import _collect_replies, _reply_key, bytes_as_dict
+from leicacam.deadline import Deadline
+
+
+def parse_command(line: str) -> list[tuple[str, str]]:
+    """Parse a ``/key:val`` line to a list of tuples."""
+    line = line.strip()
+    if not line.startswith("/"):
+        raise ValueError(f"Command must start with '/': {line}")
+    return list(bytes_as_dict(line.encode()).items())
+
+
+def read_commands(command_file: TextIO) -> list[list[tuple[str, str]]]:
+    """Read commands from a file with one command per line.
+
+    Blank lines and lines starting with '#' are skipped.
+    """
+    return [
+        parse_command(line)
+        for line in command_file
+        if line.strip() and not line.lstrip().startswith("#")
+    ]
+
+
+def _parse_filter(value: str) -> tuple[str, str | None]:
+    """Parse a 'key' or 'key=value' filter."""
+    key, sep, val = value.partition("=")
+    return key, val if sep else None
+
+
+def _matches(msg: OrderedDict[str, str], filters: list[tuple[str, str | None]]) -> bool:
+    """Return if the message matches all filters."""
+    return all(
+        key in msg and (value is None or msg[key] == value) for key, value in filters
+    )
+
+
+def _print_json(data: object, out: TextIO) -> None:
+    """Print data as a JSON line."""
+    out.write(json.dumps(data) + "\n")
+    out.flush()
+
+
+def _print_result(
+    commands: list[tuple[str, str]],
+    reply: OrderedDict[str, str] | None,
+    elapsed: float,
+    out: TextIO,
+) -> None:
+    """Print a command, its reply and the time until the reply."""
+    _print_json(
+        {
+            "command": " ".join(f"/{key}:{val}" for key, val in commands),
+            "reply": reply,
+            "elapsed_ms": round(elapsed * 1000, 3),
+        },
+        out,
+    )
+
+
+async def send(
+    cam: AsyncCAM, commands: list[tuple[str, str]], timeout: float, out: TextIO
+) -> bool:
+    """Send a command, print the reply and return if a reply was received."""
+    start = monotonic()
+    await cam.send(commands)
+    reply = await cam.wait_for(*_reply_key(commands), deadline=Deadline(timeout))
+    _print_result(commands, reply or None, monotonic() - start, out)
+    return bool(reply)
+
+
+async def run(
+    cam: AsyncCAM,
+    batch: list[list[tuple[str, str]]],
+    timeout: float,
+    out: TextIO,
+) -> bool:
+    """Send commands pipelined, print the replies and return if all replied.
+
+    The elapsed time of each command is from the batch was sent until its
+    reply was received.
+    """
+    if cam.writer is None:
+        raise RuntimeError("Not connected to CAM server.")
+    expected = [_reply_key(commands) for commands in batch]
+    replies: list[OrderedDict[str, str]] = []
+    elapsed: list[float] = []
+    start = monotonic()
+    cam.writer.write(cam._prepare_batch(batch))
+    await cam.writer.drain()
+    try:
+        async with asyncio.timeout(timeout):
+            while len(replies) < len(expected):
+                _collect_replies(await cam.receive(), expected, replies)
+                elapsed.extend([monotonic() - start] * (len(replies) - len(elapsed)))
+    except TimeoutError:
+        pass
+    for index, commands in enumerate(batch):
+        if index < len(replies):
+            _print_result(commands, replies[index], elapsed[index], out)
+        else:
+            _print_result(commands, None, monotonic() - start, out)
+    total = monotonic() - start
+    sys.stderr.write(f"{len(replies)}/{len(batch)} replies in {total * 1000:.1f} ms\n")
+    return len(replies) == len(batch)
+
+
+async def tail(
+    cam: AsyncCAM,
+    filters: list[tuple[str, str | None]],
+    count: int | None,
+    out: TextIO,
+) -> None:
+    """Print received messages matching filters as JSON lines."""
+    printed = 0
+    while count is None or printed < count:
+        msgs = await cam.receive()
+        if not msgs and cam.reader is not None and cam.reader.at_eof():
+            return
+        for msg in msgs:
+            if not _matches(msg, filters):
+                continue
+            _print_json({"timestamp": time(), "message": msg}, out)
+            printed += 1
+            if printed == count:
+                return
+
+
+def _parser() -> argparse.ArgumentParser:
+    """Return the argument parser."""
+    parser = argparse.ArgumentParser(
+        prog="leicacam", description="Send commands to a LASAF CAM server."
+    )
+    parser.add_argument("--host", default="127.0.0.1", help="CAM server host")
+    parser.add_argument("--port", type=int, default=8895, help="CAM server port")
+    parser.add_argument(
+        "--timeout", type=float, default=10, help="seconds to wait for replies"
+    )
+    subparsers = parser.add_subparsers(dest="action", required=True)
+
+    send_parser = subparsers.add_parser("send", help="send a command")
+    send_parser.add_argument("command", help="command as '/key:val /key:val'")
+
+    run_parser = subparsers.add_parser(
+        "run", help="send commands in a file as a pipelined batch"
+    )
+    run_parser.add_argument(
+        "file", type=argparse.FileType("r"), help="file with one command per line"
+    )
+
+    tail_parser = subparsers.add_parser("tail", help="print received messages")
+    tail_parser.add_argument(
+        "--filter",
+        action="append",
+        default=[],
+        type=_parse_filter,
+        help="only print messages with key or key=value, may be repeated",
+    )
+    tail_parser.add_argument(
+        "--count", type=int, default=None, help="exit after count messages"
+    )
+    return parser
+
+
+async def async_main(argv: list[str] | None = None, out: TextIO | None = None) -> int:
+    """Run the command line interface and return the exit code."""
+    args = _parser().parse_args(argv)
+    out = out or sys.stdout
+    if args.action == "send":
+        batch = [parse_command(args.command)]
+    elif args.action == "run":
+        with args.file:
+            batch = read_commands(args.file)
+    async with AsyncCAM(
+        args.host, args.port, connect_timeout=args.timeout, tcp_nodelay=True
+    ) as cam:
+        if args.action == "send":
+            return 0 if await send(cam, batch[0], args.timeout, out) else 1
+        if args.action == "run":
+            return 0 if await run(cam, batch, args.timeout, out) else 1
+        await tail(cam, args.filter, args.count, out)
+    return 0
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Run the command line interface."""
+    try:
+        return asyncio.run(async_main(argv))
+    except KeyboardInterrupt:
+        return 130
+    except (OSError, ValueError) as exc:
+        sys.stderr.write(f"leicacam: {exc}\n")
+        return 1
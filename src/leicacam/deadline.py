@@ -0,0 +1,140 @@
+"""Provide deadlines for waiting on replies from the CAM server."""
+
+from __future__ import annotations
+
+from collections.abc import AsyncIterator, Callable
+from contextlib import asynccontextmanager
+import threading
+from time import monotonic
+
+
+class Deadline:
+    """Represent a point in time on the monotonic clock to wait until.
+
+    One deadline can be passed to several calls to share it across an
+    operation of several commands. A deadline can be cancelled from any
+    thread or task, which makes waits using it return as if the deadline
+    was reached.
+
+    Parameters
+    ----------
+    timeout : float
+        Seconds from now until the deadline. If None, the deadline is only
+        reached when cancelled.
+
+    Example
+    -------
+    ::
+
+        >>> deadline = Deadline(2.5)
+        >>> cam.send_batch(settings, deadline=deadline)
+        >>> cam.wait_for('inf', 'scanfinished', deadline=deadline)
+
+    """
+
+    def __init__(self, timeout: float | None = None) -> None:
+        """Set up instance."""
+        self.when = None if timeout is None else monotonic() + timeout
+        self._cancelled = threading.Event()
+        self._lock = threading.Lock()
+        self._callbacks: list[Callable[[], None]] = []
+
+    def __repr__(self) -> str:
+        """Return the representation."""
+        return (
+            f"{type(self).__name__}(remaining={self.remaining()}, "
+            f"cancelled={self.cancelled})"
+        )
+
+    @classmethod
+    def from_minutes(cls, minutes: float) -> Deadline:
+        """Return a deadline from a timeout in minutes."""
+        return cls(minutes * 60)
+
+    @property
+    def cancelled(self) -> bool:
+        """Return if the deadline has been cancelled."""
+        return self._cancelled.is_set()
+
+    @property
+    def expired(self) -> bool:
+        """Return if the deadline is reached or cancelled."""
+        return self.remaining() == 0
+
+    def remaining(self) -> float | None:
+        """Return seconds left until the deadline, or None if unlimited."""
+        if self.cancelled:
+            return 0.0
+        if self.when is None:
+            return None
+        return max(0.0, self.when - monotonic())
+
+    def cancel(self) -> None:
+        """Cancel the deadline. This is safe to call from any thread."""
+        with self._lock:
+            if self.cancelled:
+                return
+            self._cancelled.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            callback()
+
+    def sleep(self, seconds: float) -> bool:
+        """Sleep at most seconds, until the deadline or until cancelled.
+
+        Return True if the deadline is expired after sleeping.
+        """
+        remaining = self.remaining()
+        if remaining is not None:
+            seconds = min(seconds, remaining)
+        self._cancelled.wait(seconds)
+        return self.expired
+
+    @asynccontextmanager
+    async def timeout(self) -> AsyncIterator[None]:
+        """Raise TimeoutError in the block if the deadline is reached.
+
+        Cancelling the deadline from another thread or task expires the
+        timeout immediately.
+        """
+        import asyncio
+
+        loop = asyncio.get_running_loop()
+        remaining = self.remaining()
+        async with asyncio.timeout(remaining) as scope:
+            active = True
+
+            def expire() -> None:
+                """Expire the timeout in the event loop if still active."""
+                if active:
+                    scope.reschedule(loop.time())
+
+            def on_cancel() -> None:
+                """Schedule the timeout to expire."""
+                loop.call_soon_threadsafe(expire)
+
+            self._add_callback(on_cancel)
+            try:
+                yield
+            finally:
+                active = False
+                self._remove_callback(on_cancel)
+
+    def _add_callback(self, callback: Callable[[], None]) -> None:
+        """Add a callback to call when cancelled."""
+        with self._lock:
+            if not self.cancelled:
+                self._callbacks.append(callback)
+                return
+        callback()
+
+    def _remove_callback(self, callback: Callable[[], None]) -> None:
+        """Remove a cancel callback."""
+        with self._lock:
+            if callback in self._callbacks:
+                self._callbacks.remove(callback)
+
+
+def as_deadline(timeout: float, deadline: Deadline | None) -> Deadline:
+    """Return deadline or a new deadline from a timeout in minutes."""
+    return deadline if deadline is not None else Deadline.from_minutes(timeout)
@@ -0,0 +1,108 @@
+"""Provide decoding of messages from the CAM server."""
+
+from __future__ import annotations
+
+from collections.abc import Iterator, Mapping
+
+
+class Decoder:
+    """Decode bytes from the CAM server to strings.
+
+    Values that can not be decoded with ``encoding`` are decoded with
+    ``fallback`` instead of raising, eg Windows code page paths from LASAF.
+
+    Parameters
+    ----------
+    encoding : str
+        Encoding to try first.
+    errors : str
+        Error handling of the first encoding, eg 'strict' or 'surrogateescape'.
+    fallback : str or None
+        Encoding used with 'surrogateescape' if the first encoding fails. If
+        None, decode errors are raised.
+
+    """
+
+    def __init__(
+        self,
+        encoding: str = "utf-8",
+        errors: str = "strict",
+        fallback: str | None = "cp1252",
+    ) -> None:
+        """Set up instance."""
+        self.encoding = encoding
+        self.errors = errors
+        self.fallback = fallback
+
+    def __repr__(self) -> str:
+        """Return the representation."""
+        return (
+            f"{type(self).__name__}(encoding={self.encoding!r}, "
+            f"errors={self.errors!r}, fallback={self.fallback!r})"
+        )
+
+    def decode(self, value: bytes) -> str:
+        """Decode bytes to a string."""
+        try:
+            return value.decode(self.encoding, self.errors)
+        except UnicodeDecodeError:
+            if self.fallback is None:
+                raise
+            return value.decode(self.fallback, "surrogateescape")
+
+
+DEFAULT_DECODER = Decoder()
+
+
+def split_pairs(msg: bytes) -> Iterator[tuple[bytes, bytes]]:
+    """Split a CAM message to key and value bytes based on format /key:val.
+
+    Values may contain colons, eg Windows filenames. Parts without a colon
+    are skipped.
+    """
+    # assume '/' in start
+    for part in msg[1:].split(b" /"):
+        key, sep, val = part.partition(b":")
+        if sep:
+            yield key, val
+
+
+class RawMessage(Mapping[str, str]):
+    """Represent a CAM message where values are decoded on first access.
+
+    Parameters
+    ----------
+    msg : bytes
+        Sequence of /key:val.
+    decoder : Decoder
+        Decoder for keys and values.
+
+    """
+
+    __slots__ = ("_decoder", "_values")
+
+    def __init__(self, msg: bytes, decoder: Decoder = DEFAULT_DECODER) -> None:
+        """Set up instance."""
+        self._decoder = decoder
+        self._values: dict[str, bytes | str] = {
+            decoder.decode(key): val for key, val in split_pairs(msg)
+        }
+
+    def __getitem__(self, key: str) -> str:
+        """Return the decoded value of key."""
+        value = self._values[key]
+        if isinstance(value, bytes):
+            value = self._values[key] = self._decoder.decode(value)
+        return value
+
+    def __iter__(self) -> Iterator[str]:
+        """Iterate over the keys."""
+        return iter(self._values)
+
+    def __len__(self) -> int:
+        """Return the number of keys."""
+        return len(self._values)
+
+    def __repr__(self) -> str:
+        """Return the representation."""
+        return f"{type(self).__name__}({dict(self)!r})"
@@ -0,0 +1,227 @@
+"""Provide a columnar log of messages received from the CAM server.
+
+Messages are appended to columns in memory and written to disk in chunks.
+Each chunk is a directory of ``.npy`` files that can be memory-mapped with
+``numpy.load(path, mmap_mode="r")`` without loading the messages as python
+objects::
+
+    chunk-000000/
+        index.json      row count and column names
+        time.npy        float64 receive timestamps
+        column-0.npy    int32 value codes per column, -1 if key is missing
+        strings.npy     uint8 utf-8 bytes of the distinct values
+        offsets.npy     int64 offset of each value in strings.npy
+
+Value code ``i`` is ``strings[offsets[i]:offsets[i + 1]]`` decoded as utf-8.
+Keys are interned and values are stored once per chunk, which keeps
+repeated keys and values like commands and positions compact.
+
+"""
+
+from __future__ import annotations
+
+from array import array
+import ast
+from collections import OrderedDict
+from collections.abc import Iterable, Iterator, Mapping
+from itertools import pairwise
+import json
+import logging
+import os
+import struct
+import sys
+from time import time
+from types import TracebackType
+from typing import Any
+
+_LOGGER = logging.getLogger(__name__)
+
+NPY_MAGIC = b"\x93NUMPY\x01\x00"
+_NPY_DESCR = {"d": "<f8", "i": "<i4", "q": "<i8", "B": "|u1"}
+_NPY_TYPECODE = {descr: typecode for typecode, descr in _NPY_DESCR.items()}
+MISSING = -1
+
+
+def write_npy(path: str, values: array[Any]) -> None:
+    """Write a one-dimensional array as a version 1.0 ``.npy`` file."""
+    header = (
+        f"{{'descr': '{_NPY_DESCR[values.typecode]}', "
+        f"'fortran_order': False, 'shape': ({len(values)},), }}"
+    ).encode("latin1")
+    # pad the header so the data is aligned to 64 bytes
+    padding = -(len(NPY_MAGIC) + 2 + len(header) + 1) % 64
+    header += b" " * padding + b"\n"
+    if sys.byteorder == "big" and values.itemsize > 1:
+        values = array(values.typecode, values)
+        values.byteswap()
+    with open(path, "wb") as npy_file:
+        npy_file.write(NPY_MAGIC + struct.pack("<H", len(header)) + header)
+        values.tofile(npy_file)
+
+
+def read_npy(path: str) -> array[Any]:
+    """Read a one-dimensional ``.npy`` file written by ``write_npy``."""
+    with open(path, "rb") as npy_file:
+        if npy_file.read(len(NPY_MAGIC)) != NPY_MAGIC:
+            raise ValueError(f"Not a version 1.0 npy file: {path}")
+        (header_len,) = struct.unpack("<H", npy_file.read(2))
+        header = ast.literal_eval(npy_file.read(header_len).decode("latin1"))
+        values = array(_NPY_TYPECODE[header["descr"]])
+        values.frombytes(npy_file.read())
+    if sys.byteorder == "big" and values.itemsize > 1:
+        values.byteswap()
+    return values
+
+
+class EventLog:
+    """Append received messages to a chunked columnar store on disk.
+
+    Parameters
+    ----------
+    directory : str
+        Directory to write chunks to. It is created if missing. Chunks
+        already in the directory are kept and new chunks are numbered after
+        them.
+    chunk_size : int
+        Number of messages to keep in memory before writing a chunk.
+
+    Example
+    -------
+    ::
+
+        >>> cam.event_log = EventLog('events')
+        >>> cam.wait_for('inf', 'scanfinished')
+        >>> cam.event_log.close()
+
+    """
+
+    def __init__(self, directory: str, chunk_size: int = 65536) -> None:
+        """Set up instance."""
+        self.directory = directory
+        self.chunk_size = chunk_size
+        os.makedirs(directory, exist_ok=True)
+        self.chunks = len(chunk_paths(directory))
+        self._rows = 0
+        self._time = array("d")
+        self._columns: dict[str, array[int]] = {}
+        self._values: dict[str, int] = {}
+
+    def __enter__(self) -> EventLog:
+        """Return the event log."""
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        """Write remaining messages."""
+        self.close()
+
+    def __len__(self) -> int:
+        """Return the number of messages not yet written."""
+        return self._rows
+
+    def append(self, msg: Mapping[str, str], timestamp: float | None = None) -> None:
+        """Append a message received at timestamp, default now."""
+        self._time.append(time() if timestamp is None else timestamp)
+        for key, value in msg.items():
+            column = self._columns.get(key)
+            if column is None:
+                # backfill rows received before the key was seen
+                column = array("i", [MISSING]) * self._rows
+                self._columns[sys.intern(key)] = column
+            code = self._values.setdefault(value, len(self._values))
+            column.append(code)
+        self._rows += 1
+        for column in self._columns.values():
+            if len(column) < self._rows:
+                column.append(MISSING)
+        if self._rows >= self.chunk_size:
+            self.flush()
+
+    def extend(
+        self, msgs: Iterable[Mapping[str, str]], timestamp: float | None = None
+    ) -> None:
+        """Append messages received at the same timestamp, default now."""
+        timestamp = time() if timestamp is None else timestamp
+        for msg in msgs:
+            self.append(msg, timestamp)
+
+    def flush(self) -> None:
+        """Write the messages in memory as a new chunk."""
+        if not self._rows:
+            return
+        path = os.path.join(self.directory, f"chunk-{self.chunks:06}")
+        os.makedirs(path)
+        write_npy(os.path.join(path, "time.npy"), self._time)
+        for index, column in enumerate(self._columns.values()):
+            write_npy(os.path.join(path, f"column-{index}.npy"), column)
+        strings = array("B")
+        offsets = array("q", [0])
+        for value in self._values:
+            strings.frombytes(value.encode("utf-8", "surrogateescape"))
+            offsets.append(len(strings))
+        write_npy(os.path.join(path, "strings.npy"), strings)
+        write_npy(os.path.join(path, "offsets.npy"), offsets)
+        with open(
+            os.path.join(path, "index.json"), "w", encoding="utf-8"
+        ) as index_file:
+            json.dump({"rows": self._rows, "columns": list(self._columns)}, index_file)
+        _LOGGER.debug("Wrote %s messages to %s", self._rows, path)
+        self.chunks += 1
+        self._rows = 0
+        self._time = array("d")
+        self._columns = {}
+        self._values = {}
+
+    def close(self) -> None:
+        """Write the messages in memory."""
+        self.flush()
+
+
+def chunk_paths(directory: str) -> list[str]:
+    """Return the chunk directories of an event log in order."""
+    if not os.path.isdir(directory):
+        return []
+    return [
+        os.path.join(directory, name)
+        for name in sorted(os.listdir(directory))
+        if name.startswith("chunk-")
+    ]
+
+
+def read_chunk(path: str) -> Iterator[tuple[float, OrderedDict[str, str]]]:
+    """Yield the receive time and message of each row in a chunk.
+
+    Keys of each message are in the order the keys were first seen in the
+    chunk.
+    """
+    with open(os.path.join(path, "index.json"), encoding="utf-8") as index_file:
+        index = json.load(index_file)
+    strings = read_npy(os.path.join(path, "strings.npy")).tobytes()
+    offsets = read_npy(os.path.join(path, "offsets.npy"))
+    values = [
+        strings[start:end].decode("utf-8", "surrogateescape")
+        for start, end in pairwise(offsets)
+    ]
+    columns = [
+        (key, read_npy(os.path.join(path, f"column-{column}.npy")))
+        for column, key in enumerate(index["columns"])
+    ]
+    for row, timestamp in enumerate(read_npy(os.path.join(path, "time.npy"))):
+        yield (
+            timestamp,
+            OrderedDict(
+                (key, values[codes[row]])
+                for key, codes in columns
+                if codes[row] != MISSING
+            ),
+        )
+
+
+def read_events(directory: str) -> Iterator[tuple[float, OrderedDict[str, str]]]:
+    """Yield the receive time and message of each row in an event log."""
+    for path in chunk_paths(directory):
+        yield from read_chunk(path)
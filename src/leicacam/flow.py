@@ -0,0 +1,93 @@
+"""Provide adaptive flow control for commands sent to the CAM server."""
+
+from __future__ import annotations
+
+from time import monotonic
+
+
+class FlowControl:
+    """Adapt the number of commands in flight with AIMD.
+
+    The window grows additively while replies arrive with a latency close to
+    the lowest observed latency, and shrinks multiplicatively when a reply
+    is late or missing. The window is decreased at most once per smoothed
+    round trip time, so one slow burst only counts as one congestion event.
+
+    Parameters
+    ----------
+    initial : int
+        Initial window.
+    minimum : int
+        Smallest window.
+    maximum : int
+        Largest window.
+    increase : float
+        Window increase per window of timely replies.
+    decrease : float
+        Factor to multiply the window with on congestion.
+    latency_factor : float
+        A reply slower than the lowest observed latency times this factor
+        is a congestion signal.
+
+    """
+
+    def __init__(
+        self,
+        initial: int = 4,
+        minimum: int = 1,
+        maximum: int = 64,
+        increase: float = 1.0,
+        decrease: float = 0.5,
+        latency_factor: float = 4.0,
+    ) -> None:
+        """Set up instance."""
+        if not 0 < decrease < 1:
+            raise ValueError("Decrease must be between 0 and 1.")
+        self.minimum = minimum
+        self.maximum = maximum
+        self.increase = increase
+        self.decrease = decrease
+        self.latency_factor = latency_factor
+        self._window = float(min(max(initial, minimum), maximum))
+        self.srtt: float | None = None
+        self.min_rtt: float | None = None
+        self.replies = 0
+        self.congestion_events = 0
+        self._last_decrease = float("-inf")
+
+    def __repr__(self) -> str:
+        """Return the representation."""
+        return (
+            f"{type(self).__name__}(window={self.window}, srtt={self.srtt}, "
+            f"min_rtt={self.min_rtt})"
+        )
+
+    @property
+    def window(self) -> int:
+        """Return the number of commands allowed in flight."""
+        return int(self._window)
+
+    def on_reply(self, latency: float) -> None:
+        """Update the window with the latency of a reply in seconds."""
+        self.replies += 1
+        self.min_rtt = latency if self.min_rtt is None else min(self.min_rtt, latency)
+        self.srtt = (
+            latency if self.srtt is None else 0.875 * self.srtt + 0.125 * latency
+        )
+        if latency > self.min_rtt * self.latency_factor and self.min_rtt > 0:
+            self._congestion()
+            return
+        self._window = min(self.maximum, self._window + self.increase / self._window)
+
+    def on_timeout(self) -> None:
+        """Update the window for a reply that was not received."""
+        self._congestion()
+
+    def _congestion(self) -> None:
+        """Decrease the window once per round trip time."""
+        now = monotonic()
+        if now - self._last_decrease < (self.srtt or 0):
+            return
+        self._last_decrease = now
+        self.congestion_events += 1
+        self._window = max(self.minimum, self._window * self.decrease)
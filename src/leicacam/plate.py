@@ -0,0 +1,238 @@
+"""Provide a plate geometry model for mapping wells and fields to the stage.
+
+This module requires numpy, install it with ``pip install leicacam[numpy]``.
+
+Wells and fields are numbered from 1 as in the ``enable`` command. Well x is
+the plate column and well y is the plate row, so well ``B3`` is well x 3 and
+well y 2. Stage positions are in micrometres.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterable
+import re
+
+try:
+    import numpy as np
+    import numpy.typing as npt
+except ImportError as err:  # pragma: no cover
+    raise ImportError(
+        "leicacam.plate requires numpy, install it with: pip install leicacam[numpy]"
+    ) from err
+
+_WELL_NAME = re.compile(r"([A-Z]+)(\d+)")
+
+# columns, rows and well distance in micrometres of ANSI/SBS plates
+PLATE_FORMATS: dict[int, tuple[int, int, float]] = {
+    6: (3, 2, 39120.0),
+    12: (4, 3, 26010.0),
+    24: (6, 4, 19300.0),
+    48: (8, 6, 13080.0),
+    96: (12, 8, 9000.0),
+    384: (24, 16, 4500.0),
+    1536: (48, 32, 2250.0),
+}
+
+
+def parse_well(name: str) -> tuple[int, int]:
+    """Return (well_x, well_y) of a well name like 'B3' or 'AF48'."""
+    match = _WELL_NAME.fullmatch(name.strip().upper())
+    if match is None:
+        raise ValueError(f"Invalid well name: {name}")
+    row = 0
+    for letter in match.group(1):
+        row = row * 26 + ord(letter) - ord("A") + 1
+    return int(match.group(2)), row
+
+
+def well_name(well_x: int, well_y: int) -> str:
+    """Return the well name like 'B3' of a well."""
+    if well_x < 1 or well_y < 1:
+        raise ValueError(f"Invalid well: {well_x}, {well_y}")
+    letters = ""
+    row = well_y
+    while row:
+        row, rest = divmod(row - 1, 26)
+        letters = chr(ord("A") + rest) + letters
+    return f"{letters}{well_x}"
+
+
+class PlateGeometry:
+    """Represent the geometry of wells and scan fields on a plate.
+
+    Parameters
+    ----------
+    columns : int
+        Number of well columns.
+    rows : int
+        Number of well rows.
+    well_distance : tuple of float
+        Distance in x and y between wells.
+    fields : tuple of int
+        Number of scan fields in x and y in each well.
+    field_distance : tuple of float
+        Distance in x and y between scan fields in a well.
+    start : tuple of float
+        Stage position of the first scan field of the first well.
+
+    Example
+    -------
+    ::
+
+        >>> plate = PlateGeometry.from_wells(96, fields=(2, 2),
+        ...                                  field_distance=(500, 500))
+        >>> indices = plate.field_indices(['A1', 'B3'])
+        >>> plate.to_stage(indices)
+        >>> cam.send_batch(plate.enable_commands(indices))
+
+    """
+
+    def __init__(
+        self,
+        columns: int = 12,
+        rows: int = 8,
+        well_distance: tuple[float, float] = (9000.0, 9000.0),
+        fields: tuple[int, int] = (1, 1),
+        field_distance: tuple[float, float] = (0.0, 0.0),
+        start: tuple[float, float] = (0.0, 0.0),
+    ) -> None:
+        """Set up instance."""
+        self.columns = columns
+        self.rows = rows
+        self.well_distance = np.asarray(well_distance, dtype=float)
+        self.fields = np.asarray(fields, dtype=int)
+        self.field_distance = np.asarray(field_distance, dtype=float)
+        self.start = np.asarray(start, dtype=float)
+
+    @classmethod
+    def from_wells(
+        cls,
+        wells: int,
+        fields: tuple[int, int] = (1, 1),
+        field_distance: tuple[float, float] = (0.0, 0.0),
+        start: tuple[float, float] = (0.0, 0.0),
+    ) -> PlateGeometry:
+        """Return the geometry of a standard plate with a number of wells."""
+        if wells not in PLATE_FORMATS:
+            raise ValueError(f"Unknown plate format: {wells} wells")
+        columns, rows, distance = PLATE_FORMATS[wells]
+        return cls(columns, rows, (distance, distance), fields, field_distance, start)
+
+    def __repr__(self) -> str:
+        """Return the representation."""
+        return (
+            f"{type(self).__name__}(columns={self.columns}, rows={self.rows}, "
+            f"well_distance={tuple(self.well_distance)}, "
+            f"fields={tuple(self.fields)}, "
+            f"field_distance={tuple(self.field_distance)}, "
+            f"start={tuple(self.start)})"
+        )
+
+    def wells(
+        self, wells: Iterable[str | tuple[int, int]] | None = None
+    ) -> npt.NDArray[np.int_]:
+        """Return an array of (well_x, well_y) rows.
+
+        Wells are given as names or (well_x, well_y) tuples, default all
+        wells of the plate row by row.
+        """
+        if wells is None:
+            well_y, well_x = np.mgrid[1 : self.rows + 1, 1 : self.columns + 1]
+            return np.column_stack((well_x.ravel(), well_y.ravel()))
+        result = np.array(
+            [parse_well(well) if isinstance(well, str) else well for well in wells],
+            dtype=int,
+        ).reshape(-1, 2)
+        if ((result < 1) | (result > (self.columns, self.rows))).any():
+            raise ValueError("Well outside of plate")
+        return result
+
+    def well_names(self, wells: npt.ArrayLike | None = None) -> list[str]:
+        """Return the names of wells in rows starting with (well_x, well_y).
+
+        Default all wells.
+        """
+        array = self.wells() if wells is None else np.atleast_2d(wells)
+        return [well_name(x, y) for x, y in array[:, :2].tolist()]
+
+    def field_indices(
+        self, wells: Iterable[str | tuple[int, int]] | None = None
+    ) -> npt.NDArray[np.int_]:
+        """Return an array of (well_x, well_y, field_x, field_y) rows.
+
+        All scan fields of the wells are returned, default all wells.
+        """
+        well_array = self.wells(wells)
+        field_y, field_x = np.mgrid[1 : self.fields[1] + 1, 1 : self.fields[0] + 1]
+        field_array = np.column_stack((field_x.ravel(), field_y.ravel()))
+        return np.column_stack(
+            (
+                np.repeat(well_array, len(field_array), axis=0),
+                np.tile(field_array, (len(well_array), 1)),
+            )
+        )
+
+    def to_stage(self, indices: npt.ArrayLike) -> npt.NDArray[np.float64]:
+        """Return stage (x, y) rows of (well_x, well_y, field_x, field_y) rows."""
+        array = np.asarray(indices).reshape(-1, 4)
+        return (
+            self.start
+            + (array[:, :2] - 1) * self.well_distance
+            + (array[:, 2:] - 1) * self.field_distance
+        )
+
+    def from_stage(self, positions: npt.ArrayLike) -> npt.NDArray[np.int_]:
+        """Return (well_x, well_y, field_x, field_y) rows nearest stage positions.
+
+        Positions outside of the plate are clipped to the nearest well.
+        """
+        relative = np.asarray(positions, dtype=float).reshape(-1, 2) - self.start
+        span = (self.fields - 1) * self.field_distance
+        well = np.rint((relative - span / 2) / self.well_distance).astype(int)
+        well = np.clip(well, 0, (self.columns - 1, self.rows - 1))
+        in_well = relative - well * self.well_distance
+        with np.errstate(divide="ignore", invalid="ignore"):
+            field = np.where(
+                self.field_distance > 0, np.rint(in_well / self.field_distance), 0
+            ).astype(int)
+        field = np.clip(field, 0, self.fields - 1)
+        return np.column_stack((well, field)) + 1
+
+    def enable_commands(
+        self, indices: npt.ArrayLike, value: bool = True, slide: int = 0
+    ) -> list[list[tuple[str, str]]]:
+        """Return ``enable`` commands for (well_x, well_y, field_x, field_y) rows.
+
+        Send the commands pipelined with ``cam.send_batch``.
+        """
+        array = np.asarray(indices).reshape(-1, 4)
+        enabled = "true" if value else "false"
+        return [
+            [
+                ("cmd", "enable"),
+                ("slide", str(slide)),
+                ("wellx", str(well_x)),
+                ("welly", str(well_y)),
+                ("fieldx", str(field_x)),
+                ("fieldy", str(field_y)),
+                ("value", enabled),
+            ]
+            for well_x, well_y, field_x, field_y in array.tolist()
+        ]
+
+    def position_commands(
+        self, positions: npt.ArrayLike
+    ) -> list[list[tuple[str, str]]]:
+        """Return ``setposition`` commands moving the stage to (x, y) rows."""
+        array = np.asarray(positions, dtype=float).reshape(-1, 2)
+        return [
+            [
+                ("cmd", "setposition"),
+                ("typ", "absolute"),
+                ("dev", "stage"),
+                ("unit", "microns"),
+                ("xpos", f"{x:.3f}"),
+                ("ypos", f"{y:.3f}"),
+            ]
+            for x, y in array.tolist()
+        ]
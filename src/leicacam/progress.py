@@ -0,0 +1,224 @@
+"""Provide experiment progress tracking from CAM server messages."""
+
+from __future__ import annotations
+
+import asyncio
+from collections import deque
+from collections.abc import Callable, Iterable, Mapping
+import logging
+from time import monotonic
+from typing import TYPE_CHECKING, NamedTuple
+
+from leicacam.deadline import Deadline
+from leicacam.records import ImageEvent, ScanStatusInfo, as_record
+
+if TYPE_CHECKING:
+    from leicacam.async_cam import AsyncCAM
+
+_LOGGER = logging.getLogger(__name__)
+
+FINISHED = "finished"
+RUNNING = "running"
+# unsolicited scan events sent as /inf:<event>
+_INF_STATUS = {"scanstart": RUNNING, "scanfinished": FINISHED}
+SCANSTATUS_COMMAND = [("cmd", "getinfo"), ("dev", "scanstatus")]
+
+
+class Progress(NamedTuple):
+    """Represent a snapshot of the progress of an experiment."""
+
+    status: str | None
+    well: tuple[int, int] | None
+    field: tuple[int, int] | None
+    job: int | None
+    completed: int
+    total: int | None
+    rate: float | None
+    eta: float | None
+    last_image: str | None
+
+
+def _position(x: int | None, y: int | None) -> tuple[int, int] | None:
+    """Return a position tuple if both coordinates are known."""
+    if x is None or y is None:
+        return None
+    return x, y
+
+
+class ProgressTracker:
+    """Track the progress of an experiment from received messages.
+
+    Image events update the current well, field and job and the number of
+    completed images. Scan events and ``getinfo`` scan status replies update
+    the status. Feed received messages to ``update``, or let ``track``
+    receive them from an AsyncCAM and poll the scan status infrequently.
+
+    Parameters
+    ----------
+    total : int
+        Number of images expected in the experiment, used for the ETA.
+    callback : callable
+        Called with a Progress snapshot each time the progress changes.
+    window : int
+        Number of recent images to calculate the image rate from.
+
+    Example
+    -------
+    ::
+
+        >>> tracker = ProgressTracker(total=96, callback=print)
+        >>> await cam.start_scan()
+        >>> await tracker.track(cam)
+
+    """
+
+    def __init__(
+        self,
+        total: int | None = None,
+        callback: Callable[[Progress], None] | None = None,
+        window: int = 20,
+    ) -> None:
+        """Set up instance."""
+        self.total = total
+        self.callback = callback
+        self.status: str | None = None
+        self.well: tuple[int, int] | None = None
+        self.field: tuple[int, int] | None = None
+        self.job: int | None = None
+        self.completed = 0
+        self.last_image: str | None = None
+        self.status_updated: float | None = None
+        self._image_times: deque[float] = deque(maxlen=max(window, 2))
+
+    @property
+    def finished(self) -> bool:
+        """Return if the scan is finished or all images are completed."""
+        return self.status == FINISHED or (
+            self.total is not None and self.completed >= self.total
+        )
+
+    @property
+    def rate(self) -> float | None:
+        """Return completed images per second over the recent images."""
+        if len(self._image_times) < 2:
+            return None
+        elapsed = self._image_times[-1] - self._image_times[0]
+        if elapsed <= 0:
+            return None
+        return (len(self._image_times) - 1) / elapsed
+
+    @property
+    def eta(self) -> float | None:
+        """Return estimated seconds until all images are completed."""
+        rate = self.rate
+        if self.total is None or rate is None:
+            return None
+        return max(0, self.total - self.completed) / rate
+
+    def snapshot(self) -> Progress:
+        """Return the current progress."""
+        return Progress(
+            status=self.status,
+            well=self.well,
+            field=self.field,
+            job=self.job,
+            completed=self.completed,
+            total=self.total,
+            rate=self.rate,
+            eta=self.eta,
+            last_image=self.last_image,
+        )
+
+    def update(self, msg: Mapping[str, str]) -> bool:
+        """Update the progress from a received message.
+
+        Return True if the message changed the progress.
+        """
+        record = as_record(msg)
+        now = monotonic()
+        if isinstance(record, ImageEvent):
+            self.completed += 1
+            self.last_image = record.relpath
+            self.well = _position(record.well_x, record.well_y) or self.well
+            self.field = _position(record.field_x, record.field_y) or self.field
+            self.job = record.job if record.job is not None else self.job
+            self._image_times.append(now)
+            if self.status is None:
+                self.status = RUNNING
+        elif isinstance(record, ScanStatusInfo) and record.status is not None:
+            self.status = record.status
+            self.status_updated = now
+        elif record.get("inf") in _INF_STATUS:
+            self.status = _INF_STATUS[record["inf"]]
+            self.status_updated = now
+        else:
+            return False
+        if self.callback is not None:
+            self.callback(self.snapshot())
+        return True
+
+    def update_all(self, msgs: Iterable[Mapping[str, str]]) -> bool:
+        """Update the progress from received messages.
+
+        Return True if any message changed the progress.
+        """
+        changed = False
+        for msg in msgs:
+            changed = self.update(msg) or changed
+        return changed
+
+    def next_poll(self, interval: float) -> float:
+        """Return seconds until the scan status should be polled.
+
+        The scan status should be polled when it has not been updated for
+        interval seconds.
+        """
+        if self.status_updated is None:
+            return 0
+        return max(0, interval - (monotonic() - self.status_updated))
+
+    async def track(
+        self,
+        cam: AsyncCAM,
+        poll_interval: float = 60,
+        deadline: Deadline | None = None,
+    ) -> Progress:
+        """Receive messages from cam and track progress until finished.
+
+        The scan status is only polled with ``getinfo`` when no scan event
+        or status has been received for ``poll_interval`` seconds.
+
+        Parameters
+        ----------
+        cam : leicacam.async_cam.AsyncCAM
+            Connected AsyncCAM to receive messages from.
+        poll_interval : float
+            Seconds between scan status polls without other status updates.
+        deadline : leicacam.deadline.Deadline
+            Stop tracking when the deadline is reached or cancelled.
+
+        Returns
+        -------
+        Progress
+            Progress when tracking stopped.
+
+        """
+        deadline = deadline or Deadline()
+        while not self.finished and not deadline.expired:
+            if not self.next_poll(poll_interval):
+                _LOGGER.debug("Polling scan status")
+                await cam.send(SCANSTATUS_COMMAND)
+                # count the poll as an update to not poll again until interval
+                self.status_updated = monotonic()
+            try:
+                async with (
+                    deadline.timeout(),
+                    asyncio.timeout(self.next_poll(poll_interval)),
+                ):
+                    msgs = await cam.receive()
+            except TimeoutError:
+                continue
+            if not msgs and cam.reader is not None and cam.reader.at_eof():
+                break
+            self.update_all(msgs)
+        return self.snapshot()
@@ -0,0 +1,226 @@
+"""Provide typed records for responses from the CAM server."""
+
+from __future__ import annotations
+
+from collections import OrderedDict
+from collections.abc import Callable, Iterator, Mapping
+import re
+from typing import Any
+
+from leicacam.cam import _split_messages, debug
+from leicacam.decoder import DEFAULT_DECODER, Decoder, RawMessage
+
+_UNSET: Any = object()
+_IMAGE_ATTR = re.compile(r"--([A-Z])(\d+)")
+
+
+def _to_bool(value: str) -> bool:
+    """Convert a CAM boolean string."""
+    return value.lower() == "true"
+
+
+def _image_attr(attr: str) -> Callable[[str], int | None]:
+    """Return a converter for an attribute in an image filename.
+
+    LASAF image filenames contain attributes like ``--U01--V02--X00``.
+    """
+
+    def convert(relpath: str) -> int | None:
+        """Extract the attribute from the image path."""
+        for match in _IMAGE_ATTR.finditer(relpath):
+            if match.group(1) == attr:
+                return int(match.group(2))
+        return None
+
+    return convert
+
+
+class _Field:
+    """Describe a typed field that is converted on first access.
+
+    The converted value is stored in the slot named after the field with a
+    leading underscore, which the record class must declare.
+    """
+
+    def __init__(self, key: str, convert: Callable[[str], Any] = str) -> None:
+        """Set up instance."""
+        self.key = key
+        self.convert = convert
+        self.slot = ""
+
+    def __set_name__(self, owner: type, name: str) -> None:
+        """Store the slot name of the field."""
+        self.slot = "_" + name
+
+    def __get__(self, instance: Response | None, owner: type) -> Any:
+        """Return the converted value or None if the key is missing."""
+        if instance is None:
+            return self
+        value = getattr(instance, self.slot, _UNSET)
+        if value is _UNSET:
+            raw = instance.raw.get(self.key)
+            value = None if raw is None else self.convert(raw)
+            setattr(instance, self.slot, value)
+        return value
+
+
+class Response(Mapping[str, str]):
+    """Represent a message received from the CAM server.
+
+    The record also behaves as a read-only mapping of the received
+    ``/key:val`` pairs, so it can be used where an OrderedDict was used.
+    """
+
+    __slots__ = ("raw",)
+
+    def __init__(self, raw: Mapping[str, str]) -> None:
+        """Set up instance."""
+        # keep lazily decoded messages as is
+        self.raw: Mapping[str, str] = raw if isinstance(raw, RawMessage) else dict(raw)
+
+    def __getitem__(self, key: str) -> str:
+        """Return the raw value of key."""
+        return self.raw[key]
+
+    def __iter__(self) -> Iterator[str]:
+        """Iterate over the keys."""
+        return iter(self.raw)
+
+    def __len__(self) -> int:
+        """Return the number of keys."""
+        return len(self.raw)
+
+    def __eq__(self, other: object) -> bool:
+        """Return if other has the same raw values."""
+        if isinstance(other, Response):
+            return self.raw == other.raw
+        if isinstance(other, Mapping):
+            return self.raw == dict(other)
+        return NotImplemented
+
+    def __hash__(self) -> int:
+        """Return hash of the raw values."""
+        return hash(tuple(self.raw.items()))
+
+    def __repr__(self) -> str:
+        """Return the representation."""
+        return f"{type(self).__name__}({self.raw!r})"
+
+    def as_dict(self) -> OrderedDict[str, str]:
+        """Return the raw values as an OrderedDict."""
+        return OrderedDict(self.raw)
+
+
+class StageInfo(Response):
+    """Represent a ``getinfo`` reply about the stage."""
+
+    __slots__ = ("_x", "_y")
+
+    x = _Field("xpos", float)
+    y = _Field("ypos", float)
+
+
+class ZDriveInfo(Response):
+    """Represent a ``getinfo`` reply about the z-drive."""
+
+    __slots__ = ("_z",)
+
+    z = _Field("zpos", float)
+
+
+class ScanStatusInfo(Response):
+    """Represent a ``getinfo`` reply about the scan status."""
+
+    __slots__ = ("_status",)
+
+    status = _Field("status")
+
+
+class EnableReply(Response):
+    """Represent the reply to an ``enable`` command."""
+
+    __slots__ = ("_fieldx", "_fieldy", "_slide", "_value", "_wellx", "_welly")
+
+    slide = _Field("slide", int)
+    wellx = _Field("wellx", int)
+    welly = _Field("welly", int)
+    fieldx = _Field("fieldx", int)
+    fieldy = _Field("fieldy", int)
+    value = _Field("value", _to_bool)
+
+
+class ImageEvent(Response):
+    """Represent an event about an acquired image.
+
+    Well, field and other attributes are parsed from the image path.
+    """
+
+    __slots__ = (
+        "_channel",
+        "_field_x",
+        "_field_y",
+        "_job",
+        "_relpath",
+        "_time",
+        "_well_x",
+        "_well_y",
+        "_z",
+    )
+
+    relpath = _Field("relpath")
+    well_x = _Field("relpath", _image_attr("U"))
+    well_y = _Field("relpath", _image_attr("V"))
+    job = _Field("relpath", _image_attr("J"))
+    field_x = _Field("relpath", _image_attr("X"))
+    field_y = _Field("relpath", _image_attr("Y"))
+    time = _Field("relpath", _image_attr("T"))
+    z = _Field("relpath", _image_attr("Z"))
+    channel = _Field("relpath", _image_attr("C"))
+
+
+_INFO_RECORDS: dict[str, type[Response]] = {
+    "stage": StageInfo,
+    "zdrive": ZDriveInfo,
+    "scanstatus": ScanStatusInfo,
+}
+
+
+def as_record(msg: Mapping[str, str]) -> Response:
+    """Return a typed record for a received message.
+
+    Parameters
+    ----------
+    msg : mapping
+        Received message, eg from ``CAM.receive`` or ``CAM.get_information``.
+
+    Returns
+    -------
+    Response
+        Record of the most specific known type for the message.
+
+    Example
+    -------
+    ::
+
+        >>> record = as_record(cam.get_information('stage'))
+        >>> record.x
+        0.0123
+
+    """
+    if "relpath" in msg:
+        return ImageEvent(msg)
+    if msg.get("cmd") == "enable":
+        return EnableReply(msg)
+    record_type = _INFO_RECORDS.get(msg.get("dev", ""), Response)
+    return record_type(msg)
+
+
+def parse_records(
+    incoming: bytes, decoder: Decoder = DEFAULT_DECODER
+) -> list[Response]:
+    """Parse received bytes to a list of typed records.
+
+    Values are decoded when they are first accessed.
+    """
+    debug(b"< " + incoming)
+    return [as_record(RawMessage(msg, decoder)) for msg in _split_messages(incoming)]
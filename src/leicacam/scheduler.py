@@ -0,0 +1,310 @@
+"""Provide a priority command scheduler for the CAM server."""
+
+from __future__ import annotations
+
+import asyncio
+from collections import OrderedDict, deque
+from collections.abc import Callable
+import contextlib
+from enum import IntEnum
+import logging
+from time import monotonic
+from types import TracebackType
+
+from leicacam.async_cam import AsyncCAM
+from leicacam.cam import _reply_key
+from leicacam.deadline import Deadline, as_deadline
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class Lane(IntEnum):
+    """Priority lanes, lower value is sent first."""
+
+    CONTROL = 0
+    NORMAL = 1
+    BULK = 2
+
+
+CONTROL_COMMANDS = frozenset({"stopscan", "pausescan", "skip", "stopcamscan"})
+BULK_COMMANDS = frozenset({"enable", "maf", "add", "selectfield"})
+
+
+def command_lane(commands: list[tuple[str, str]]) -> Lane:
+    """Return the default lane of commands based on the cmd value."""
+    cmd = dict(commands).get("cmd")
+    if cmd in CONTROL_COMMANDS:
+        return Lane.CONTROL
+    if cmd in BULK_COMMANDS:
+        return Lane.BULK
+    return Lane.NORMAL
+
+
+class _Pending:
+    """Represent a command waiting to be sent or for its reply."""
+
+    __slots__ = ("commands", "future", "lane", "reply_key", "sent")
+
+    def __init__(
+        self,
+        commands: list[tuple[str, str]],
+        lane: Lane,
+        future: asyncio.Future[OrderedDict[str, str]],
+    ) -> None:
+        """Set up instance."""
+        self.commands = commands
+        self.lane = lane
+        self.future = future
+        self.reply_key = _reply_key(commands)
+        self.sent = 0.0
+
+
+class CommandScheduler:
+    """Send commands through an AsyncCAM by priority lane.
+
+    Commands are written without waiting for the reply of earlier commands.
+    Commands in the control lane are always written next and are not limited
+    by the in-flight window, so a stop or pause reaches LASAF ahead of queued
+    bulk traffic. Replies are matched to the oldest sent command with the
+    same reply key. Received messages that are not a reply are passed to
+    ``event_callback``.
+
+    Parameters
+    ----------
+    cam : leicacam.async_cam.AsyncCAM
+        Connected AsyncCAM instance. It must not be used directly while the
+        scheduler is running.
+    max_in_flight : int
+        Maximum number of sent commands waiting for a reply, not counting
+        the control lane. If the cam has flow control, its adaptive window
+        is used instead.
+    rate_limits : dict
+        Maximum commands per second per lane. Lanes without a limit are
+        not rate limited.
+    event_callback : callable
+        Called with each received message that is not a reply.
+
+    Example
+    -------
+    ::
+
+        >>> async with CommandScheduler(cam, rate_limits={Lane.BULK: 50}) as sched:
+        ...     reply = await sched.send([('cmd', 'stopscan')])
+
+    """
+
+    def __init__(
+        self,
+        cam: AsyncCAM,
+        max_in_flight: int = 8,
+        rate_limits: dict[Lane, float] | None = None,
+        event_callback: Callable[[OrderedDict[str, str]], None] | None = None,
+    ) -> None:
+        """Set up instance."""
+        self.cam = cam
+        self.max_in_flight = max_in_flight
+        self.rate_limits = rate_limits or {}
+        self.event_callback = event_callback
+        self._lanes: dict[Lane, deque[_Pending]] = {lane: deque() for lane in Lane}
+        self._in_flight: deque[_Pending] = deque()
+        self._next_allowed: dict[Lane, float] = dict.fromkeys(Lane, 0.0)
+        self._wakeup = asyncio.Event()
+        self._tasks: list[asyncio.Task[None]] = []
+
+    async def __aenter__(self) -> CommandScheduler:
+        """Start the scheduler."""
+        self.start()
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_val: BaseException | None,
+        exc_tb: TracebackType | None,
+    ) -> None:
+        """Stop the scheduler."""
+        await self.stop()
+
+    @property
+    def in_flight(self) -> int:
+        """Return the number of non-control commands waiting for a reply."""
+        return sum(1 for pending in self._in_flight if pending.lane != Lane.CONTROL)
+
+    @property
+    def window(self) -> int:
+        """Return the number of non-control commands allowed in flight."""
+        if self.cam.flow_control is not None:
+            return self.cam.flow_control.window
+        return self.max_in_flight
+
+    @property
+    def queued(self) -> int:
+        """Return the number of commands waiting to be sent."""
+        return sum(len(lane) for lane in self._lanes.values())
+
+    def start(self) -> None:
+        """Start the sender and receiver tasks."""
+        if self._tasks:
+            return
+        self._tasks = [
+            asyncio.create_task(self._send_loop()),
+            asyncio.create_task(self._receive_loop()),
+        ]
+
+    async def stop(self) -> None:
+        """Stop the tasks and cancel commands without a reply."""
+        tasks, self._tasks = self._tasks, []
+        for task in tasks:
+            task.cancel()
+        for task in tasks:
+            with contextlib.suppress(asyncio.CancelledError):
+                await task
+        for pending in self._in_flight:
+            pending.future.cancel()
+        self._in_flight.clear()
+        for lane in self._lanes.values():
+            for pending in lane:
+                pending.future.cancel()
+            lane.clear()
+
+    def submit(
+        self, commands: list[tuple[str, str]], lane: Lane | None = None
+    ) -> asyncio.Future[OrderedDict[str, str]]:
+        """Queue commands and return a future for the reply.
+
+        Parameters
+        ----------
+        commands : list of tuples
+            Commands as a list of tuples. cam.prefix is always prepended
+            before sending.
+        lane : Lane
+            Lane to send in. Defaults to the lane for the cmd value, see
+            ``command_lane``.
+
+        Returns
+        -------
+        asyncio.Future
+            Future resolved with the reply as an OrderedDict.
+
+        """
+        if lane is None:
+            lane = command_lane(commands)
+        future: asyncio.Future[OrderedDict[str, str]] = (
+            asyncio.get_running_loop().create_future()
+        )
+        self._lanes[lane].append(_Pending(commands, lane, future))
+        self._wakeup.set()
+        return future
+
+    async def send(
+        self,
+        commands: list[tuple[str, str]],
+        lane: Lane | None = None,
+        timeout: float = 60,
+        *,
+        deadline: Deadline | None = None,
+    ) -> OrderedDict[str, str]:
+        """Send commands by priority and wait for the reply.
+
+        Parameters
+        ----------
+        commands : list of tuples
+            Commands as a list of tuples.
+        lane : Lane
+            Lane to send in, see ``submit``.
+        timeout : int
+            Minutes to wait for the reply. If timeout is reached, an empty
+            OrderedDict will be returned. Ignored if deadline is given.
+        deadline : leicacam.deadline.Deadline
+            Deadline to wait for the reply until.
+
+        Returns
+        -------
+        collections.OrderedDict
+            Reply or empty message if timeout is reached.
+
+        """
+        future = self.submit(commands, lane)
+        try:
+            async with as_deadline(timeout, deadline).timeout():
+                return await future
+        except TimeoutError:
+            self._discard(future)
+            return OrderedDict()
+
+    def _discard(self, future: asyncio.Future[OrderedDict[str, str]]) -> None:
+        """Forget a command that timed out, freeing its place in the window."""
+        future.cancel()
+        for pending in self._in_flight:
+            if pending.future is future:
+                self._in_flight.remove(pending)
+                if self.cam.flow_control is not None:
+                    self.cam.flow_control.on_timeout()
+                self._wakeup.set()
+                return
+
+    def _next(self, now: float) -> tuple[_Pending | None, float | None]:
+        """Return the next command to send or the seconds until one is due."""
+        delay: float | None = None
+        for lane, queue in self._lanes.items():
+            while queue and queue[0].future.done():
+                queue.popleft()  # timed out before it was sent
+            if not queue:
+                continue
+            if lane != Lane.CONTROL and self.in_flight >= self.window:
+                continue
+            wait = self._next_allowed[lane] - now
+            if wait > 0:
+                delay = wait if delay is None else min(delay, wait)
+                continue
+            if rate := self.rate_limits.get(lane):
+                self._next_allowed[lane] = max(self._next_allowed[lane], now) + 1 / rate
+            return queue.popleft(), None
+        return None, delay
+
+    async def _send_loop(self) -> None:
+        """Write queued commands by priority."""
+        while True:
+            self._wakeup.clear()
+            now = monotonic()
+            pending, delay = self._next(now)
+            if pending is None:
+                with contextlib.suppress(TimeoutError):
+                    async with asyncio.timeout(delay):
+                        await self._wakeup.wait()
+                continue
+            pending.sent = now
+            self._in_flight.append(pending)
+            try:
+                await self.cam.send(pending.commands)
+            except Exception as exc:
+                self._in_flight.remove(pending)
+                if not pending.future.done():
+                    pending.future.set_exception(exc)
+
+    async def _receive_loop(self) -> None:
+        """Match received messages to sent commands."""
+        while True:
+            msgs = await self.cam.receive()
+            if not msgs:
+                # connection error or closed, avoid a busy loop
+                await asyncio.sleep(self.cam.delay)
+                continue
+            now = monotonic()
+            for msg in msgs:
+                self._match(msg, now)
+
+    def _match(self, msg: OrderedDict[str, str], now: float) -> None:
+        """Resolve the oldest sent command that the message is a reply to."""
+        for pending in self._in_flight:
+            key, value = pending.reply_key
+            if msg.get(key) == value:
+                self._in_flight.remove(pending)
+                if not pending.future.done():
+                    pending.future.set_result(msg)
+                if self.cam.flow_control is not None:
+                    self.cam.flow_control.on_reply(now - pending.sent)
+                self._wakeup.set()
+                return
+        if self.event_callback is not None:
+            self.event_callback(msg)
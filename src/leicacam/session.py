@@ -0,0 +1,295 @@
+"""Provide capture and replay of CAM sessions.
+
+A session file starts with a magic header followed by records of a fixed
+size header and the payload. Each header holds the seconds since recording
+started, the direction and the payload length. Direction ``S`` is bytes
+sent by the client and ``R`` is bytes received by the client.
+
+Replay a session against a local stand-in server with::
+
+    python -m leicacam.session session.cam --port 8895 --speed 10
+
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+from collections.abc import Iterator
+import logging
+import socket
+import struct
+from time import monotonic
+from types import TracebackType
+from typing import Any, BinaryIO, NamedTuple
+
+_LOGGER = logging.getLogger(__name__)
+
+MAGIC = b"LCAMREC1"
+SENT = b"S"
+RECEIVED = b"R"
+_HEADER = struct.Struct("<dcI")
+
+
+class SessionEvent(NamedTuple):
+    """Represent a recorded chunk of bytes."""
+
+    timestamp: float
+    direction: bytes
+    data: bytes
+
+
+class SessionRecorder:
+    """Append bytes exchanged with the CAM server to a session file.
+
+    Parameters
+    ----------
+    path : str
+        Session file. A new file gets a magic header, an existing file is
+        appended to.
+
+    """
+
+    def __init__(self, path: str) -> None:
+        """Set up instance."""
+        self.path = path
+        self._file: BinaryIO = open(path, "ab")
+        if self._file.tell() == 0:
+            self._file.write(MAGIC)
+        self._start = monotonic()
+
+    def __enter__(self) -> SessionRecorder:
+        """Return recorder."""
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_val: BaseException | None,
+        exc_tb: TracebackType | None,
+    ) -> None:
+        """Close recorder."""
+        self.close()
+
+    def record(self, direction: bytes, data: bytes) -> None:
+        """Append a chunk of bytes in direction to the session file."""
+        if not data or self._file.closed:
+            return
+        self._file.write(_HEADER.pack(monotonic() - self._start, direction, len(data)))
+        self._file.write(data)
+
+    def flush(self) -> None:
+        """Flush the session file."""
+        self._file.flush()
+
+    def close(self) -> None:
+        """Close the session file."""
+        self._file.close()
+
+
+def read_session(path: str) -> Iterator[SessionEvent]:
+    """Read the recorded events of a session file.
+
+    Parameters
+    ----------
+    path : str
+        Session file written by SessionRecorder.
+
+    Returns
+    -------
+    iterator of SessionEvent
+        Events in the order they were recorded. A truncated last record
+        is skipped.
+
+    """
+    with open(path, "rb") as session_file:
+        if session_file.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"Not a session file: {path}")
+        while header := session_file.read(_HEADER.size):
+            if len(header) < _HEADER.size:
+                return
+            timestamp, direction, length = _HEADER.unpack(header)
+            data = session_file.read(length)
+            if len(data) < length:
+                return
+            yield SessionEvent(timestamp, direction, data)
+
+
+class RecordingSocket:
+    """Wrap a socket and record the bytes sent and received."""
+
+    def __init__(self, sock: socket.socket, recorder: SessionRecorder) -> None:
+        """Set up instance."""
+        self._socket = sock
+        self.recorder = recorder
+
+    def __getattr__(self, name: str) -> Any:
+        """Delegate other attributes to the socket."""
+        return getattr(self._socket, name)
+
+    def send(self, data: bytes) -> int:
+        """Send data and record the bytes sent."""
+        sent = self._socket.send(data)
+        self.recorder.record(SENT, data[:sent])
+        return sent
+
+    def sendall(self, data: bytes) -> None:
+        """Send all data and record it."""
+        self._socket.sendall(data)
+        self.recorder.record(SENT, data)
+
+    def recv(self, buffer_size: int) -> bytes:
+        """Receive data and record it."""
+        data = self._socket.recv(buffer_size)
+        self.recorder.record(RECEIVED, data)
+        return data
+
+    def close(self) -> None:
+        """Close the socket and flush the recorder."""
+        self.recorder.flush()
+        self._socket.close()
+
+
+class RecordingStreamReader:
+    """Wrap an asyncio stream reader and record the bytes read."""
+
+    def __init__(self, reader: asyncio.StreamReader, recorder: SessionRecorder) -> None:
+        """Set up instance."""
+        self._reader = reader
+        self.recorder = recorder
+
+    def __getattr__(self, name: str) -> Any:
+        """Delegate other attributes to the reader."""
+        return getattr(self._reader, name)
+
+    async def read(self, n: int = -1) -> bytes:
+        """Read data and record it."""
+        data = await self._reader.read(n)
+        self.recorder.record(RECEIVED, data)
+        return data
+
+
+class RecordingStreamWriter:
+    """Wrap an asyncio stream writer and record the bytes written."""
+
+    def __init__(self, writer: asyncio.StreamWriter, recorder: SessionRecorder) -> None:
+        """Set up instance."""
+        self._writer = writer
+        self.recorder = recorder
+
+    def __getattr__(self, name: str) -> Any:
+        """Delegate other attributes to the writer."""
+        return getattr(self._writer, name)
+
+    def write(self, data: bytes) -> None:
+        """Write data and record it."""
+        self._writer.write(data)
+        self.recorder.record(SENT, data)
+
+    def close(self) -> None:
+        """Close the writer and flush the recorder."""
+        self.recorder.flush()
+        self._writer.close()
+
+
+class ReplayServer:
+    """Serve a recorded session to a client as a stand-in CAM server.
+
+    Bytes the client received are sent at their recorded time divided by
+    speed. Before continuing past bytes the client sent, the server waits
+    for the same number of bytes from the client. Differences between the
+    recorded and actual client bytes are counted in ``mismatches``.
+
+    Parameters
+    ----------
+    path : str
+        Session file to replay.
+    host : str
+        Host to listen on.
+    port : int
+        Port to listen on. Use 0 to pick a free port.
+    speed : float
+        Replay speed factor. Use ``float('inf')`` to replay without delays.
+
+    """
+
+    def __init__(
+        self,
+        path: str,
+        host: str = "127.0.0.1",
+        port: int = 8895,
+        speed: float = 1.0,
+    ) -> None:
+        """Set up instance."""
+        if speed <= 0:
+            raise ValueError("Speed must be positive.")
+        self.events = list(read_session(path))
+        self.host = host
+        self.port = port
+        self.speed = speed
+        self.mismatches = 0
+        self.server: asyncio.Server | None = None
+
+    async def start(self) -> asyncio.Server:
+        """Start listening for clients."""
+        if self.server is None:
+            self.server = await asyncio.start_server(self._serve, self.host, self.port)
+            self.port = self.server.sockets[0].getsockname()[1]
+        return self.server
+
+    async def serve_forever(self) -> None:
+        """Start listening and serve until cancelled."""
+        server = await self.start()
+        async with server:
+            await server.serve_forever()
+
+    async def close(self) -> None:
+        """Stop listening for clients."""
+        if self.server is None:
+            return
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def _serve(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        """Replay the session to a client."""
+        start = monotonic()
+        try:
+            for event in self.events:
+                if event.direction == SENT:
+                    data = await reader.readexactly(len(event.data))
+                    if data != event.data:
+                        self.mismatches += 1
+                        _LOGGER.debug("Mismatch: %s != %s", data, event.data)
+                    continue
+                delay = start + event.timestamp / self.speed - monotonic()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                writer.write(event.data)
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            _LOGGER.debug("Client disconnected before end of session")
+        finally:
+            writer.close()
+
+
+def main(argv: list[str] | None = None) -> None:
+    """Replay a session file on a local stand-in server."""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("path", help="session file to replay")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8895)
+    parser.add_argument(
+        "--speed", type=float, default=1.0, help="replay speed factor (inf: no delay)"
+    )
+    args = parser.parse_args(argv)
+    server = ReplayServer(args.path, args.host, args.port, args.speed)
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""Provide declarative settings profiles for the CAM server."""
+
+from __future__ import annotations
+
+from collections import OrderedDict
+from collections.abc import Iterable, Iterator
+from typing import Any
+
+SETTINGS_COMMANDS = frozenset(
+    {
+        "adjust",
+        "adjustls",
+        "adjustmatrix",
+        "adjustmosaic",
+        "barcode",
+        "enableattribute",
+        "loop",
+        "pump",
+    }
+)
+
+SettingKey = tuple[tuple[str, str], ...]
+
+
+def _setting_key(command: list[tuple[str, str]]) -> SettingKey:
+    """Return the key identifying which setting a command changes.
+
+    A setting is identified by all parameters of the command except ``value``.
+    """
+    return tuple((key, val) for key, val in command if key != "value")
+
+
+class SettingsProfile:
+    """Declarative collection of settings commands.
+
+    Each settings command is stored once per setting. A setting is identified
+    by the command and all its parameters except ``value``, so adding a
+    command for the same setting again replaces the earlier one. For example::
+
+        >>> profile = SettingsProfile()
+        >>> profile.set(
+        ...     'adjust', tar='pmt', num=1, exp='gfp', prop='gain', value=700
+        ... ).set('loop', count=3)
+        >>> cam.apply_settings(profile)
+
+    """
+
+    def __init__(self, commands: Iterable[list[tuple[str, Any]]] = ()) -> None:
+        """Set up instance."""
+        self._settings: OrderedDict[SettingKey, list[tuple[str, str]]] = OrderedDict()
+        for command in commands:
+            self.add(command)
+
+    def __eq__(self, other: object) -> bool:
+        """Return if other profile contains the same settings."""
+        if not isinstance(other, SettingsProfile):
+            return NotImplemented
+        return self._settings == other._settings
+
+    def __iter__(self) -> Iterator[list[tuple[str, str]]]:
+        """Iterate over the settings commands."""
+        return iter(self.commands)
+
+    def __len__(self) -> int:
+        """Return the number of settings."""
+        return len(self._settings)
+
+    def __repr__(self) -> str:
+        """Return the representation."""
+        return f"{type(self).__name__}({self.commands!r})"
+
+    @property
+    def commands(self) -> list[list[tuple[str, str]]]:
+        """Return the settings commands as lists of tuples."""
+        return [list(command) for command in self._settings.values()]
+
+    def add(self, command: list[tuple[str, Any]]) -> None:
+        """Add a settings command to the profile.
+
+        Parameters
+        ----------
+        command : list of tuples
+            Command as a list of tuples, eg ``[('cmd', 'loop'), ('count', 3)]``.
+            Keys and values are converted to strings.
+
+        """
+        normalized = [(str(key), str(val)) for key, val in command]
+        cmd = dict(normalized).get("cmd")
+        if cmd not in SETTINGS_COMMANDS:
+            raise ValueError(f"Not a settings command: {cmd}")
+        self._settings[_setting_key(normalized)] = normalized
+
+    def set(self, cmd: str, **params: Any) -> SettingsProfile:
+        """Add a settings command from keyword parameters and return profile."""
+        self.add([("cmd", cmd), *params.items()])
+        return self
+
+    def copy(self) -> SettingsProfile:
+        """Return a copy of the profile."""
+        return SettingsProfile(self._settings.values())
+
+    def diff(self, previous: SettingsProfile | None) -> list[list[tuple[str, str]]]:
+        """Return the commands needed to go from previous profile to this one.
+
+        Parameters
+        ----------
+        previous : SettingsProfile or None
+            Last applied profile. If None, all commands are returned.
+
+        Returns
+        -------
+        list of lists of tuples
+            Commands for settings that are new or changed.
+
+        """
+        if previous is None:
+            return self.commands
+        return [
+            list(command)
+            for key, command in self._settings.items()
+            if previous._settings.get(key) != command
+        ]
+
+    def confirmed(
+        self,
+        commands: list[list[tuple[str, str]]],
+        replies: list[OrderedDict[str, str]],
+    ) -> SettingsProfile:
+        """Return a copy updated with the commands that received a reply.
+
+        Commands with an empty reply are left out so they are sent again
+        the next time a profile is applied.
+        """
+        profile = self.copy()
+        for command, reply in zip(commands, replies, strict=True):
+            if reply:
+                profile.add(command)
+        return profile
@@ -0,0 +1,228 @@
+"""Provide a manager for LASAF scanning templates."""
+
+from __future__ import annotations
+
+from collections import OrderedDict
+import functools
+import os
+from typing import TYPE_CHECKING, NamedTuple
+
+if TYPE_CHECKING:
+    from leicacam.cam import CAM
+
+TEMPLATE_PREFIX = "{ScanningTemplate}"
+
+
+@functools.lru_cache(maxsize=256)
+def template_name(filename: str) -> str:
+    """Return the template name LASAF expects for a filename.
+
+    The basename is used, '.xml' is stripped and '{ScanningTemplate}' is
+    prepended if missing.
+
+    Parameters
+    ----------
+    filename : str
+        Filename of template, may contain a path.
+
+    Returns
+    -------
+    str
+        Template name.
+
+    Example
+    -------
+    ::
+
+        >>> template_name('/path/to/leicacam.xml')
+        '{ScanningTemplate}leicacam'
+
+    """
+    basename = os.path.basename(filename)
+    if basename[-4:] == ".xml":
+        basename = basename[:-4]
+    if basename[:18] != TEMPLATE_PREFIX:
+        basename = TEMPLATE_PREFIX + basename
+    return basename
+
+
+class ScanField(NamedTuple):
+    """Represent a scan field in a scanning template."""
+
+    well_x: int
+    well_y: int
+    field_x: int
+    field_y: int
+    x: float
+    y: float
+    enabled: bool
+
+
+class ScanningTemplate:
+    """Represent the well and field geometry of a scanning template."""
+
+    def __init__(self, fields: list[ScanField]) -> None:
+        """Set up instance."""
+        self.fields = fields
+        self._index = {
+            (field.well_x, field.well_y, field.field_x, field.field_y): field
+            for field in fields
+        }
+
+    @classmethod
+    def from_file(cls, path: str) -> ScanningTemplate:
+        """Parse a scanning template XML file.
+
+        Parameters
+        ----------
+        path : str
+            Path to the template XML file written by LASAF.
+
+        Returns
+        -------
+        ScanningTemplate
+            Parsed template.
+
+        """
+        # import on first parse to keep import of leicacam fast
+        from xml.etree import ElementTree
+
+        # templates are local files written by LASAF
+        tree = ElementTree.parse(path)  # noqa: S314
+        fields = [
+            ScanField(
+                int(elem.get("WellX", 1)),
+                int(elem.get("WellY", 1)),
+                int(elem.get("FieldX", 1)),
+                int(elem.get("FieldY", 1)),
+                float(elem.get("FieldXCoordinate", 0)),
+                float(elem.get("FieldYCoordinate", 0)),
+                elem.get("Enabled", "true").lower() == "true",
+            )
+            for elem in tree.iter("ScanFieldData")
+        ]
+        return cls(fields)
+
+    @property
+    def wells(self) -> list[tuple[int, int]]:
+        """Return the sorted well coordinates as (well_x, well_y)."""
+        return sorted({(field.well_x, field.well_y) for field in self.fields})
+
+    def field(
+        self, well_x: int = 1, well_y: int = 1, field_x: int = 1, field_y: int = 1
+    ) -> ScanField | None:
+        """Return a scan field or None if it is not in the template."""
+        return self._index.get((well_x, well_y, field_x, field_y))
+
+    def well_fields(self, well_x: int = 1, well_y: int = 1) -> list[ScanField]:
+        """Return the scan fields of a well."""
+        return [
+            field
+            for field in self.fields
+            if field.well_x == well_x and field.well_y == well_y
+        ]
+
+
+class TemplateManager:
+    """Keep track of scanning templates loaded and saved through a CAM.
+
+    The manager remembers the currently loaded template and skips load
+    commands for it. Templates loaded or saved outside of the manager are
+    not tracked.
+
+    Parameters
+    ----------
+    cam : leicacam.cam.CAM
+        Connected CAM instance.
+    template_dir : str
+        Optional local directory with the template XML files. When given,
+        known templates are indexed from it and templates can be parsed.
+
+    """
+
+    def __init__(self, cam: CAM, template_dir: str | None = None) -> None:
+        """Set up instance."""
+        self.cam = cam
+        self.template_dir = template_dir
+        self.loaded: str | None = None
+        self.known: set[str] = set()
+        self._load_response: OrderedDict[str, str] = OrderedDict()
+        self._cache: dict[str, tuple[int, ScanningTemplate]] = {}
+        if template_dir is not None:
+            self.refresh_index()
+
+    def refresh_index(self) -> set[str]:
+        """Index the template names in the template directory."""
+        if self.template_dir is None:
+            return self.known
+        for entry in os.scandir(self.template_dir):
+            if (
+                entry.is_file()
+                and entry.name.startswith(TEMPLATE_PREFIX)
+                and entry.name.endswith(".xml")
+            ):
+                self.known.add(template_name(entry.name))
+        return self.known
+
+    def load(self, filename: str, force: bool = False) -> OrderedDict[str, str]:
+        """Load a template unless it is already loaded.
+
+        Parameters
+        ----------
+        filename : str
+            Template to load, see ``CAM.load_template``.
+        force : bool
+            Send the load command even if the template is already loaded.
+
+        Returns
+        -------
+        collections.OrderedDict
+            Response from LASAF when the template was loaded.
+
+        """
+        name = template_name(filename)
+        if not force and name == self.loaded:
+            return self._load_response
+        response = self.cam.load_template(name)
+        if response:
+            self.loaded = name
+            self.known.add(name)
+        else:
+            self.loaded = None
+        self._load_response = response
+        return response
+
+    def save(self, filename: str) -> OrderedDict[str, str]:
+        """Save the current template to filename and index it."""
+        name = template_name(filename)
+        response = self.cam.save_template(name + ".xml")
+        if response:
+            self.known.add(name)
+            self._cache.pop(name, None)
+        return response
+
+    def invalidate(self) -> None:
+        """Forget the loaded template, eg after loading it outside the manager."""
+        self.loaded = None
+        self._load_response = OrderedDict()
+
+    def template(self, filename: str | None = None) -> ScanningTemplate:
+        """Return the parsed template, defaults to the loaded template.
+
+        Parsed templates are cached until the file modification time changes.
+        """
+        if self.template_dir is None:
+            raise RuntimeError("No template directory configured.")
+        if filename is None:
+            if self.loaded is None:
+                raise RuntimeError("No template loaded.")
+            filename = self.loaded
+        name = template_name(filename)
+        path = os.path.join(self.template_dir, name + ".xml")
+        mtime = os.stat(path).st_mtime_ns
+        cached = self._cache.get(name)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+        template = ScanningTemplate.from_file(path)
+        self._cache[name] = (mtime, template)
+        return template
@@ -0,0 +1,142 @@
+"""Provide a thread-safe interface to the CAM server."""
+
+from __future__ import annotations
+
+from collections import OrderedDict
+from concurrent.futures import Future
+import logging
+import queue
+import threading
+from types import TracebackType
+
+from leicacam.cam import CAM
+
+_LOGGER = logging.getLogger(__name__)
+
+_Item = tuple[list[tuple[str, str]], Future[OrderedDict[str, str]]]
+
+
+class ThreadedCAM:
+    """Share a CAM connection between threads.
+
+    A single I/O thread owns the CAM socket. Commands submitted from any
+    thread are queued, and the I/O thread sends the commands waiting in the
+    queue pipelined in one batch and resolves each future with its reply.
+
+    Parameters
+    ----------
+    cam : leicacam.cam.CAM
+        Connected CAM instance. It must not be used directly after this.
+    timeout : float
+        Minutes to wait for the replies to a batch. An empty OrderedDict is
+        the result of a command without a reply before timeout.
+    max_batch : int
+        Maximum number of commands sent in one batch.
+
+    Example
+    -------
+    ::
+
+        >>> with ThreadedCAM(CAM()) as threaded_cam:
+        ...     future = threaded_cam.submit([('cmd', 'getinfo'), ('dev', 'stage')])
+        ...     future.result()
+
+    """
+
+    def __init__(self, cam: CAM, timeout: float = 60, max_batch: int = 64) -> None:
+        """Set up instance."""
+        self.cam = cam
+        self.timeout = timeout
+        self.max_batch = max_batch
+        self._queue: queue.SimpleQueue[_Item | None] = queue.SimpleQueue()
+        self._closed = False
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(
+            target=self._run, name="leicacam-io", daemon=True
+        )
+        self._thread.start()
+
+    def __enter__(self) -> ThreadedCAM:
+        """Return instance."""
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_val: BaseException | None,
+        exc_tb: TracebackType | None,
+    ) -> None:
+        """Stop the I/O thread and close the CAM."""
+        self.close()
+
+    def submit(self, commands: list[tuple[str, str]]) -> Future[OrderedDict[str, str]]:
+        """Queue commands to be sent and return a future for the reply.
+
+        Parameters
+        ----------
+        commands : list of tuples
+            Commands as a list of tuples. cam.prefix is always prepended
+            before sending.
+
+        Returns
+        -------
+        concurrent.futures.Future
+            Future resolved with the reply as an OrderedDict.
+
+        """
+        future: Future[OrderedDict[str, str]] = Future()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("ThreadedCAM is closed.")
+            self._queue.put((commands, future))
+        return future
+
+    def send(self, commands: list[tuple[str, str]]) -> OrderedDict[str, str]:
+        """Send commands and wait for the reply."""
+        return self.submit(commands).result()
+
+    def close(self) -> None:
+        """Stop the I/O thread after queued commands and close the CAM."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(None)
+        self._thread.join()
+        self.cam.close()
+
+    def _next_batch(self) -> tuple[list[_Item], bool]:
+        """Wait for queued commands and return them and if closing."""
+        item = self._queue.get()
+        if item is None:
+            return [], True
+        items = [item]
+        while len(items) < self.max_batch:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                return items, True
+            items.append(item)
+        return items, False
+
+    def _run(self) -> None:
+        """Send queued commands until closed."""
+        closing = False
+        while not closing:
+            items, closing = self._next_batch()
+            items = [item for item in items if item[1].set_running_or_notify_cancel()]
+            if not items:
+                continue
+            try:
+                replies = self.cam.send_batch(
+                    [commands for commands, _ in items], timeout=self.timeout
+                )
+            except Exception as exc:
+                _LOGGER.debug("Error sending batch: %s", exc)
+                for _, future in items:
+                    future.set_exception(exc)
+                continue
+            for (_, future), reply in zip(items, replies, strict=True):
+                future.set_result(reply)
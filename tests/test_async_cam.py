@@ -1,11 +1,14 @@
 """Tests for async cam module."""
 
+import asyncio
 from unittest.mock import AsyncMock, Mock, patch
 
 import pytest
 
-from leicacam.async_cam import AsyncCAM
+from leicacam.async_cam import AsyncCAM, connect_all
 from leicacam.cam import bytes_as_dict, tuples_as_dict
+from leicacam.deadline import Deadline
+from leicacam.settings import SettingsProfile
 
 
 class MockEchoConnection:
@@ -112,7 +115,113 @@ async def test_receive_error(async_cam, mock_reader):
     assert not response
 
 
+async def test_send_batch(async_cam):
+    """Test sending several commands in one write."""
+    batch = [
+        [("cmd", "enableall"), ("value", "false")],
+        [("cmd", "startscan")],
+    ]
+    responses = await async_cam.send_batch(batch)
+
+    assert responses == [tuples_as_dict(async_cam.prefix + cmd) for cmd in batch]
+    assert await async_cam.send_batch([]) == []
+
+
+async def test_send_batch_deadline(async_cam, mock_reader):
+    """Test that one deadline is shared between calls."""
+    deadline = Deadline(10)
+    batch = [[("cmd", "startscan")]]
+    assert await async_cam.send_batch(batch, deadline=deadline) == [
+        tuples_as_dict(async_cam.prefix + batch[0])
+    ]
+
+    async def read_nothing(_buffer_size):
+        """Return no data."""
+        await asyncio.sleep(0)
+        return b""
+
+    mock_reader.read = read_nothing
+    asyncio.get_running_loop().call_later(0.01, deadline.cancel)
+    assert await async_cam.send_batch(batch, deadline=deadline) == [{}]
+    assert await async_cam.wait_for("cmd", "startscan", deadline=deadline) == {}
+
+
+async def test_apply_settings(async_cam, mock_connection):
+    """Test applying a settings profile only sends changed settings."""
+    profile = SettingsProfile().set("loop", count=2).set("pump", value="on")
+    responses = await async_cam.apply_settings(profile)
+
+    assert len(responses) == 2
+    assert async_cam.settings_profile == profile
+
+    profile.set("loop", count=3)
+    responses = await async_cam.apply_settings(profile)
+
+    assert len(responses) == 1
+    assert mock_connection.msg == async_cam.prefix_bytes + b"/cmd:loop /count:3"
+
+
+async def test_assign_jobs(async_cam, mock_connection):
+    """Test assigning jobs to fields in one batch."""
+    confirmed = await async_cam.assign_jobs(
+        {(1, 1, 1, 1): "Job1", (1, 1, 2, 1): "Job2"}
+    )
+
+    assert confirmed == {"Job1": True, "Job2": True}
+    assert mock_connection.msg.count(b"/cmd:assignjob") == 2
+    assert mock_connection.msg.endswith(b"/cmd:assignjob /job:Job2")
+
+
 async def test_close(async_cam, mock_writer):
     """Test writer close."""
     async_cam.close()
     assert mock_writer.close.call_count == 1
+
+
+async def test_context_manager(mock_open_connection, mock_writer):
+    """Test using AsyncCAM as an async context manager."""
+    async with AsyncCAM(tcp_nodelay=True) as async_cam:
+        assert async_cam.writer is mock_writer
+
+    assert mock_writer.close.call_count == 1
+    assert mock_writer.wait_closed.call_count == 1
+    assert async_cam.writer is None
+    await async_cam.wait_closed()
+
+
+async def test_wait_closed_connection_error(async_cam, mock_writer):
+    """Test that a connection error while closing is ignored."""
+    mock_writer.wait_closed.side_effect = ConnectionResetError()
+    async_cam.close()
+    await async_cam.wait_closed()
+
+    assert async_cam.writer is None
+
+
+async def test_connect_welcome_timeout():
+    """Test connecting to a server that does not send a welcome message."""
+    writers = []
+
+    async def handle(reader, writer):
+        """Accept connection without sending a welcome message."""
+        writers.append(writer)
+
+    server = await asyncio.start_server(handle, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    async_cam = AsyncCAM(port=port, connect_timeout=0.05)
+    with pytest.raises(TimeoutError):
+        await async_cam.connect()
+    await async_cam.wait_closed()
+    for writer in writers:
+        writer.close()
+    server.close()
+    await server.wait_closed()
+
+
+async def test_connect_all(mock_open_connection):
+    """Test connecting several instances in parallel."""
+    error = OSError("unreachable")
+    mock_open_connection.side_effect = [mock_open_connection.return_value, error]
+    results = await connect_all([AsyncCAM(), AsyncCAM(host="10.0.0.1")])
+
+    assert results == [None, error]
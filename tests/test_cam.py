@@ -1,11 +1,15 @@
 """Tests for cam module."""
 
 from collections import OrderedDict
-from unittest.mock import MagicMock, patch
+from itertools import chain, repeat
+import socket
+import threading
+from unittest.mock import MagicMock, call, patch
 
 import pytest
 
 from leicacam.cam import CAM, bytes_as_dict, tuples_as_bytes, tuples_as_dict
+from leicacam.deadline import Deadline
 
 
 @pytest.fixture
@@ -42,6 +46,10 @@ class EchoSocket:
         self.msg = msg
         return len(msg)
 
+    def sendall(self, msg):
+        """Send all of a message."""
+        self.msg = msg
+
     def recv(self, buffer_size):
         """Receive a message."""
         return self.msg[0:buffer_size]
@@ -253,14 +261,30 @@ def test_wait_for_long_timeout(cam, mock_socket):
     timeout = 1
     mock_socket.recv = MagicMock()
     mock_socket.recv.return_value = b""
-    time_patch = patch("leicacam.cam.time", side_effect=[0, 0, 120])
-    sleep_patch = patch("leicacam.cam.sleep")
-    with sleep_patch, time_patch:
+    time_patch = patch(
+        "leicacam.deadline.monotonic", side_effect=chain([0, 0], repeat(120))
+    )
+    with time_patch:
         response = cam.wait_for(cmd, value, timeout)
 
     assert response == OrderedDict()
 
 
+def test_wait_for_deadline(cam, mock_socket):
+    """Test wait_for until a deadline cancelled from another thread."""
+    mock_socket.recv = MagicMock(return_value=b"")
+    deadline = Deadline()
+    timer = threading.Timer(0.01, deadline.cancel)
+    timer.start()
+    response = cam.wait_for("cmd", "stopscan", deadline=deadline)
+    timer.join()
+
+    assert response == OrderedDict()
+    assert cam.send_batch([[("cmd", "startscan")]], deadline=deadline) == [
+        OrderedDict()
+    ]
+
+
 def test_wait_for_any_value(cam):
     """Test wait_for a command and any value."""
     cmd = [("cmd", "startscan")]
@@ -317,3 +341,102 @@ def test_receive_terminate_null_byte(cam):
 
     assert isinstance(response, list)
     assert response == all_cmds
+
+
+def test_send_batch(cam, mock_socket):
+    """Test sending several commands in one write."""
+    batch = [
+        [("cmd", "enableall"), ("value", "false")],
+        [("cmd", "startscan")],
+    ]
+    responses = cam.send_batch(batch)
+
+    assert mock_socket.msg.count(cam.prefix_bytes) == 2
+    assert responses == [tuples_as_dict(cam.prefix + cmd) for cmd in batch]
+    assert cam.send_batch([]) == []
+
+
+def test_assign_jobs(cam, mock_socket):
+    """Test assigning jobs to fields grouped by job."""
+    confirmed = cam.assign_jobs(
+        {(1, 1, 1, 1): "Job1", (1, 1, 2, 1): "Job2", (2, 1, 1, 1): "Job1"}, slide=1
+    )
+
+    assert confirmed == {"Job1": True, "Job2": True}
+    msgs = mock_socket.msg.split(b"\r\n")
+    assert [bytes_as_dict(msg)["cmd"] for msg in msgs] == [
+        "selectallfields",
+        "selectfield",
+        "selectfield",
+        "assignjob",
+        "selectallfields",
+        "selectfield",
+        "assignjob",
+    ]
+    assert b"/slide:1 /wellx:2 /welly:1 /fieldx:1 /fieldy:1 /value:true" in msgs[2]
+    assert msgs[3].endswith(b"/cmd:assignjob /job:Job1")
+
+
+def test_assign_jobs_timeout(cam, mock_socket):
+    """Test that jobs without all replies are not confirmed."""
+    mock_socket.recv = MagicMock(
+        side_effect=chain(
+            [b"/cmd:selectallfields\r\n/cmd:selectfield\r\n/cmd:assignjob"],
+            repeat(b""),
+        )
+    )
+    time_patch = patch(
+        "leicacam.deadline.monotonic", side_effect=chain([0, 0], repeat(120))
+    )
+    with time_patch:
+        confirmed = cam.assign_jobs({(1, 1, 1, 1): "Job1", (1, 1, 2, 1): "Job2"})
+
+    assert confirmed == {"Job1": True, "Job2": False}
+
+
+def test_send_batch_timeout(cam, mock_socket):
+    """Test send_batch when not all replies are received."""
+    mock_socket.recv = MagicMock()
+    mock_socket.recv.return_value = b"/cmd:enableall"
+    batch = [[("cmd", "enableall")], [("cmd", "startscan")]]
+    time_patch = patch(
+        "leicacam.deadline.monotonic", side_effect=chain([0, 0], repeat(120))
+    )
+    with time_patch:
+        responses = cam.send_batch(batch, timeout=1)
+
+    assert responses == [OrderedDict([("cmd", "enableall")]), OrderedDict()]
+
+
+def test_context_manager(mock_socket):
+    """Test using CAM as a context manager."""
+    with patch("socket.socket", return_value=mock_socket), CAM() as cam:
+        assert cam.socket is mock_socket
+
+    assert mock_socket.close.call_count == 1
+
+
+def test_connect_socket_options():
+    """Test connect timeout and socket options."""
+    mock_socket = MagicMock()
+    with patch("socket.socket", return_value=mock_socket):
+        CAM(connect_timeout=2.5, tcp_nodelay=True, keepalive=True)
+
+    assert mock_socket.settimeout.mock_calls == [call(2.5), call(False)]
+    assert mock_socket.setsockopt.mock_calls == [
+        call(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1),
+        call(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1),
+    ]
+
+
+def test_connect_welcome_timeout():
+    """Test that a missing welcome message raises and closes the socket."""
+    mock_socket = MagicMock()
+    mock_socket.recv.side_effect = TimeoutError()
+    with (
+        patch("socket.socket", return_value=mock_socket),
+        pytest.raises(TimeoutError),
+    ):
+        CAM()
+
+    assert mock_socket.close.call_count == 1
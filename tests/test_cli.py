@@ -0,0 +1,164 @@
+"""Tests for cli module."""
+
+import asyncio
+import io
+import json
+from unittest.mock import patch
+
+import pytest
+
+from leicacam.cli import async_main, main, parse_command, read_commands
+
+WELCOME = b"/app:matrix /welcome:hello\r\n"
+
+
+@pytest.fixture(name="server_port")
+async def server_port_fixture():
+    """Start a local CAM server echoing each message and return its port."""
+    writers = []
+
+    async def handle(reader, writer):
+        """Send welcome message and echo messages."""
+        writers.append(writer)
+        writer.write(WELCOME)
+        while data := await reader.read(4096):
+            for msg in data.split(b"\r\n"):
+                if b"/cmd:silent" not in msg:
+                    writer.write(msg + b"\r\n")
+        writer.close()
+
+    server = await asyncio.start_server(handle, "127.0.0.1", 0)
+    yield server.sockets[0].getsockname()[1]
+    for writer in writers:
+        writer.close()
+    server.close()
+    await server.wait_closed()
+
+
+def _lines(out):
+    """Return the printed JSON lines."""
+    return [json.loads(line) for line in out.getvalue().splitlines()]
+
+
+def test_parse_command():
+    """Test parsing a command line."""
+    assert parse_command(" /cmd:getinfo /dev:stage\n") == [
+        ("cmd", "getinfo"),
+        ("dev", "stage"),
+    ]
+    with pytest.raises(ValueError, match="must start with"):
+        parse_command("cmd:getinfo")
+
+
+def test_read_commands():
+    """Test reading a command file."""
+    command_file = io.StringIO("# comment\n/cmd:startscan\n\n/cmd:stopscan\n")
+    assert read_commands(command_file) == [
+        [("cmd", "startscan")],
+        [("cmd", "stopscan")],
+    ]
+
+
+async def test_send(server_port):
+    """Test sending a single command."""
+    out = io.StringIO()
+    code = await async_main(
+        ["--port", str(server_port), "send", "/cmd:getinfo /dev:stage"], out
+    )
+
+    assert code == 0
+    [line] = _lines(out)
+    assert line["command"] == "/cmd:getinfo /dev:stage"
+    assert line["reply"]["dev"] == "stage"
+    assert line["elapsed_ms"] >= 0
+
+
+async def test_send_timeout(server_port):
+    """Test sending a command without reply."""
+    out = io.StringIO()
+    code = await async_main(
+        ["--port", str(server_port), "--timeout", "0.05", "send", "/cmd:silent"], out
+    )
+
+    assert code == 1
+    assert _lines(out)[0]["reply"] is None
+
+
+async def test_run(server_port, tmp_path):
+    """Test running a command file as a batch."""
+    command_file = tmp_path / "commands.txt"
+    command_file.write_text("/cmd:enable /wellx:1\n/cmd:silent\n/cmd:startscan\n")
+    out = io.StringIO()
+    code = await async_main(
+        ["--port", str(server_port), "--timeout", "0.1", "run", str(command_file)],
+        out,
+    )
+
+    assert code == 1
+    lines = _lines(out)
+    assert [line["reply"] and line["reply"]["cmd"] for line in lines] == [
+        "enable",
+        None,
+        None,
+    ]
+
+    command_file.write_text("/cmd:enable /wellx:1\n/cmd:startscan\n")
+    out = io.StringIO()
+    code = await async_main(["--port", str(server_port), "run", str(command_file)], out)
+
+    assert code == 0
+    assert len(_lines(out)) == 2
+
+
+async def _event_server(events):
+    """Start a server sending welcome and events, then closing."""
+
+    async def handle(_reader, writer):
+        """Send welcome message and events."""
+        writer.write(WELCOME)
+        await writer.drain()
+        await asyncio.sleep(0.05)
+        writer.write(events)
+        await writer.drain()
+        writer.close()
+
+    return await asyncio.start_server(handle, "127.0.0.1", 0)
+
+
+async def test_tail():
+    """Test printing filtered received messages."""
+    server = await _event_server(
+        b"/relpath:image--U01.tif\r\n/cmd:startscan\r\n/relpath:other.tif\r\n"
+    )
+    port = str(server.sockets[0].getsockname()[1])
+    out = io.StringIO()
+    async with server:
+        code = await async_main(["--port", port, "tail", "--filter", "relpath"], out)
+        assert code == 0
+        assert [line["message"]["relpath"] for line in _lines(out)] == [
+            "image--U01.tif",
+            "other.tif",
+        ]
+
+        out = io.StringIO()
+        await async_main(
+            ["--port", port, "tail", "--filter", "relpath=other.tif", "--count", "1"],
+            out,
+        )
+        [line] = _lines(out)
+        assert line["message"] == {"relpath": "other.tif"}
+        assert line["timestamp"] > 0
+
+
+def test_main_error():
+    """Test that connection errors are printed."""
+    with patch("leicacam.cli.async_main", side_effect=OSError("refused")):
+        assert main(["send", "/cmd:startscan"]) == 1
+
+    def interrupt(coro):
+        """Close the coroutine and raise KeyboardInterrupt."""
+        coro.close()
+        raise KeyboardInterrupt
+
+    with patch("leicacam.cli.asyncio.run", side_effect=interrupt):
+        assert main(["send", "/cmd:startscan"]) == 130
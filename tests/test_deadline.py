@@ -0,0 +1,100 @@
+"""Tests for deadline module."""
+
+import asyncio
+from itertools import chain, repeat
+import threading
+from unittest.mock import patch
+
+import pytest
+
+from leicacam.deadline import Deadline, as_deadline
+
+
+def test_remaining():
+    """Test remaining seconds on the monotonic clock."""
+    with patch("leicacam.deadline.monotonic", side_effect=[100, 101.5, 103]):
+        deadline = Deadline(2)
+        assert deadline.remaining() == 0.5
+        assert deadline.expired
+
+    deadline = Deadline()
+    assert deadline.remaining() is None
+    assert not deadline.expired
+    assert Deadline.from_minutes(1).remaining() > 59
+
+
+def test_as_deadline():
+    """Test converting a timeout in minutes to a deadline."""
+    deadline = Deadline()
+    assert as_deadline(1, deadline) is deadline
+    with patch("leicacam.deadline.monotonic", side_effect=chain([0], repeat(30))):
+        assert as_deadline(0.5, None).remaining() == 0
+
+
+def test_cancel():
+    """Test cancelling a deadline."""
+    deadline = Deadline()
+    deadline.cancel()
+    deadline.cancel()
+
+    assert deadline.cancelled
+    assert deadline.expired
+    assert deadline.remaining() == 0
+    assert "cancelled=True" in repr(deadline)
+
+
+def test_sleep_cancelled_from_thread():
+    """Test that cancelling from another thread ends a sleep."""
+    deadline = Deadline()
+    timer = threading.Timer(0.01, deadline.cancel)
+    timer.start()
+
+    assert deadline.sleep(10)
+    timer.join()
+
+
+def test_sleep_until_deadline():
+    """Test that sleep does not sleep past the deadline."""
+    deadline = Deadline(0)
+    assert deadline.sleep(10)
+    assert not Deadline(10).sleep(0)
+
+
+async def test_timeout():
+    """Test async timeout until the deadline."""
+    with pytest.raises(TimeoutError):
+        async with Deadline(0.01).timeout():
+            await asyncio.sleep(10)
+
+    async with Deadline(10).timeout():
+        await asyncio.sleep(0)
+
+
+async def test_timeout_cancelled():
+    """Test cancelling an async timeout from a task and a thread."""
+    deadline = Deadline()
+    asyncio.get_running_loop().call_later(0.01, deadline.cancel)
+    with pytest.raises(TimeoutError):
+        async with deadline.timeout():
+            await asyncio.sleep(10)
+
+    with pytest.raises(TimeoutError):
+        async with deadline.timeout():
+            await asyncio.sleep(10)
+
+    deadline = Deadline()
+    timer = threading.Timer(0.01, deadline.cancel)
+    timer.start()
+    with pytest.raises(TimeoutError):
+        async with deadline.timeout():
+            await asyncio.sleep(10)
+    timer.join()
+
+
+async def test_timeout_cancelled_after_exit():
+    """Test that cancelling after the block is done has no effect."""
+    deadline = Deadline()
+    async with deadline.timeout():
+        pass
+    deadline.cancel()
+    await asyncio.sleep(0)
@@ -0,0 +1,69 @@
+"""Tests for decoder module."""
+
+import pytest
+
+from leicacam.cam import bytes_as_dict
+from leicacam.decoder import Decoder, RawMessage, split_pairs
+from leicacam.records import StageInfo, parse_records
+
+CP1252_PATH = "C:\\data\\plate_\xe9.ome.tif".encode("cp1252")
+
+
+def test_decode_fallback():
+    """Test that bytes invalid in UTF-8 are decoded with the fallback."""
+    decoder = Decoder()
+    assert decoder.decode("é".encode()) == "é"
+    assert decoder.decode(CP1252_PATH) == "C:\\data\\plate_é.ome.tif"
+    # undefined in cp1252
+    assert decoder.decode(b"\x81").encode("cp1252", "surrogateescape") == b"\x81"
+
+
+def test_decode_no_fallback():
+    """Test that decode errors are raised without fallback."""
+    decoder = Decoder(fallback=None)
+    with pytest.raises(UnicodeDecodeError):
+        decoder.decode(CP1252_PATH)
+
+    decoder = Decoder(errors="surrogateescape", fallback=None)
+    assert decoder.decode(CP1252_PATH).encode(errors="surrogateescape") == (CP1252_PATH)
+    assert repr(decoder) == (
+        "Decoder(encoding='utf-8', errors='surrogateescape', fallback=None)"
+    )
+
+
+def test_bytes_as_dict_invalid_utf8():
+    """Test that an invalid UTF-8 value does not raise."""
+    msg = b"/cmd:image /relpath:" + CP1252_PATH + b" /value"
+
+    assert bytes_as_dict(msg) == {
+        "cmd": "image",
+        "relpath": "C:\\data\\plate_é.ome.tif",
+    }
+
+
+def test_split_pairs():
+    """Test splitting a message to key and value bytes."""
+    assert list(split_pairs(b"/a:1 /b /c:d:\\e")) == [(b"a", b"1"), (b"c", b"d:\\e")]
+
+
+def test_raw_message_lazy_decode():
+    """Test that values are decoded on first access."""
+    decoder = Decoder(fallback=None)
+    msg = RawMessage(b"/dev:stage /relpath:" + CP1252_PATH, decoder)
+
+    assert len(msg) == 2
+    assert list(msg) == ["dev", "relpath"]
+    assert msg["dev"] == "stage"
+    with pytest.raises(UnicodeDecodeError):
+        msg["relpath"]
+    assert repr(RawMessage(b"/dev:stage")) == "RawMessage({'dev': 'stage'})"
+
+
+def test_parse_records_lazy():
+    """Test parsing records with lazily decoded values."""
+    [record] = parse_records(b"/dev:stage /xpos:1.5\r\n")
+
+    assert isinstance(record, StageInfo)
+    assert isinstance(record.raw, RawMessage)
+    assert record.x == 1.5
+    assert record == {"dev": "stage", "xpos": "1.5"}
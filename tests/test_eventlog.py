@@ -0,0 +1,130 @@
+"""Tests for eventlog module."""
+
+from array import array
+from collections import OrderedDict
+import os
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from leicacam.cam import CAM
+from leicacam.eventlog import (
+    EventLog,
+    chunk_paths,
+    read_chunk,
+    read_events,
+    read_npy,
+    write_npy,
+)
+
+MESSAGES = [
+    {"relpath": "image--U00--V00.tif"},
+    {"cmd": "getinfo", "dev": "stage", "xpos": "0.5", "ypos": "1"},
+    {"relpath": "image--U00--V01.tif", "dev": "stage"},
+]
+
+
+def test_npy_round_trip(tmp_path):
+    """Test writing and reading npy files."""
+    path = str(tmp_path / "values.npy")
+    for values in (array("d", [0.5, 1.5]), array("i", [-1, 2]), array("B")):
+        write_npy(path, values)
+        assert read_npy(path) == values
+        with open(path, "rb") as npy_file:
+            header_len = npy_file.read(10)[8]
+        assert (10 + header_len) % 64 == 0
+
+    (tmp_path / "bad.npy").write_bytes(b"not npy")
+    with pytest.raises(ValueError, match="npy"):
+        read_npy(str(tmp_path / "bad.npy"))
+
+
+def test_chunks(tmp_path):
+    """Test that messages are written in chunks and read back."""
+    directory = str(tmp_path / "events")
+    with EventLog(directory, chunk_size=2) as event_log:
+        for index, msg in enumerate(MESSAGES):
+            event_log.append(msg, timestamp=index)
+        assert event_log.chunks == 1
+        assert len(event_log) == 1
+
+    assert len(chunk_paths(directory)) == 2
+    assert list(read_events(directory)) == [
+        (float(index), OrderedDict(msg)) for index, msg in enumerate(MESSAGES)
+    ]
+
+    event_log = EventLog(directory)
+    event_log.extend(MESSAGES[:2], timestamp=5)
+    event_log.close()
+    event_log.close()
+    assert event_log.chunks == 3
+    assert [timestamp for timestamp, _ in read_chunk(chunk_paths(directory)[2])] == [
+        5.0,
+        5.0,
+    ]
+    assert chunk_paths(str(tmp_path / "missing")) == []
+
+
+def test_columns(tmp_path):
+    """Test that keys are columns and values are stored once."""
+    directory = str(tmp_path / "events")
+    with EventLog(directory) as event_log:
+        event_log.extend(MESSAGES * 3)
+
+    path = chunk_paths(directory)[0]
+    assert sorted(os.listdir(path)) == [
+        "column-0.npy",
+        "column-1.npy",
+        "column-2.npy",
+        "column-3.npy",
+        "column-4.npy",
+        "index.json",
+        "offsets.npy",
+        "strings.npy",
+        "time.npy",
+    ]
+    # relpath column, codes into the distinct values
+    assert (
+        read_npy(os.path.join(path, "column-0.npy")).tolist()
+        == [
+            0,
+            -1,
+            5,
+        ]
+        * 3
+    )
+    assert len(read_npy(os.path.join(path, "offsets.npy"))) == 7
+
+
+def test_numpy_memory_map(tmp_path):
+    """Test that chunks can be memory-mapped with numpy."""
+    np = pytest.importorskip("numpy")
+    directory = str(tmp_path / "events")
+    with EventLog(directory) as event_log:
+        event_log.extend(MESSAGES, timestamp=1.5)
+
+    path = chunk_paths(directory)[0]
+    codes = np.load(os.path.join(path, "column-0.npy"), mmap_mode="r")
+    strings = np.load(os.path.join(path, "strings.npy"), mmap_mode="r")
+    offsets = np.load(os.path.join(path, "offsets.npy"), mmap_mode="r")
+    times = np.load(os.path.join(path, "time.npy"), mmap_mode="r")
+
+    assert codes.dtype == np.int32
+    assert times.tolist() == [1.5] * 3
+    code = codes[2]
+    assert bytes(strings[offsets[code] : offsets[code + 1]]) == b"image--U00--V01.tif"
+
+
+def test_cam_event_log(tmp_path):
+    """Test that received messages are appended to the cam event log."""
+    mock_socket = MagicMock()
+    with patch("socket.socket", return_value=mock_socket):
+        cam = CAM()
+    cam.event_log = EventLog(str(tmp_path / "events"))
+    mock_socket.recv.return_value = b"/relpath:image.tif\r\n/inf:scanfinished"
+
+    assert len(cam.receive()) == 2
+    assert len(cam.event_log) == 2
+    mock_socket.recv.side_effect = OSError
+    assert cam.receive() == []
+    assert len(cam.event_log) == 2
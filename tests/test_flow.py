@@ -0,0 +1,129 @@
+"""Tests for flow module."""
+
+import asyncio
+from collections import OrderedDict
+from itertools import chain, repeat
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from leicacam.async_cam import AsyncCAM
+from leicacam.cam import CAM
+from leicacam.flow import FlowControl
+from leicacam.scheduler import CommandScheduler
+
+
+def test_additive_increase():
+    """Test that timely replies grow the window by one per window."""
+    flow = FlowControl(initial=2, maximum=4)
+    for _ in range(2):
+        flow.on_reply(0.01)
+    assert flow.window == 2
+    flow.on_reply(0.01)
+    assert flow.window == 3
+    for _ in range(20):
+        flow.on_reply(0.01)
+    assert flow.window == 4
+    assert flow.min_rtt == 0.01
+    assert flow.replies == 23
+    assert repr(flow) == (
+        f"FlowControl(window=4, srtt={flow.srtt}, min_rtt={flow.min_rtt})"
+    )
+
+
+def test_multiplicative_decrease():
+    """Test that a late reply or timeout halves the window once per rtt."""
+    flow = FlowControl(initial=16)
+    flow.on_reply(0.01)
+    flow.on_reply(1.0)
+    assert flow.window == 8
+    assert flow.congestion_events == 1
+
+    # within the same round trip time
+    flow.on_timeout()
+    assert flow.window == 8
+
+    with patch("leicacam.flow.monotonic", return_value=1e9):
+        flow.on_timeout()
+    assert flow.window == 4
+
+    flow = FlowControl(initial=1)
+    flow.on_timeout()
+    assert flow.window == 1
+
+
+def test_invalid_decrease():
+    """Test that decrease must be a factor below one."""
+    with pytest.raises(ValueError, match="Decrease"):
+        FlowControl(decrease=1)
+
+
+def test_cam_send_batch_chunks():
+    """Test that CAM splits a batch to the flow control window."""
+    mock_socket = MagicMock()
+    with patch("socket.socket", return_value=mock_socket):
+        cam = CAM()
+    cam.flush = MagicMock()
+    cam.flow_control = FlowControl(initial=2)
+    mock_socket.recv.side_effect = [
+        b"/cmd:enable\r\n/cmd:enable",
+        b"/cmd:enable\r\n/cmd:enable",
+        b"/cmd:enable",
+    ]
+    replies = cam.send_batch([[("cmd", "enable")]] * 5)
+
+    assert replies == [OrderedDict([("cmd", "enable")])] * 5
+    assert [
+        call.args[0].count(b"/cmd:enable") for call in mock_socket.sendall.mock_calls
+    ] == [2, 2, 1]
+
+
+def test_cam_send_batch_chunk_timeout():
+    """Test that commands are not sent after a chunk timed out."""
+    mock_socket = MagicMock()
+    with patch("socket.socket", return_value=mock_socket):
+        cam = CAM()
+    cam.flush = MagicMock()
+    cam.flow_control = FlowControl(initial=2)
+    mock_socket.recv.side_effect = [b"/cmd:enable", b"", b""]
+    time_patch = patch(
+        "leicacam.deadline.monotonic", side_effect=chain([0, 0], repeat(120))
+    )
+    with time_patch:
+        replies = cam.send_batch([[("cmd", "enable")]] * 4, timeout=1)
+
+    assert replies == [OrderedDict([("cmd", "enable")])] + [OrderedDict()] * 3
+    assert mock_socket.sendall.call_count == 1
+    assert cam.flow_control.congestion_events == 1
+
+
+async def test_async_cam_send_batch_timeout():
+    """Test that an AsyncCAM batch timeout is reported to flow control."""
+    async_cam = AsyncCAM()
+    async_cam.flow_control = FlowControl(initial=2)
+    async_cam.writer = MagicMock()
+    async_cam.writer.drain = AsyncMock()
+
+    async def read(buffer_size):
+        """Reply to the first chunk only."""
+        if async_cam.writer.write.call_count == 1:
+            return b"/cmd:enable\r\n/cmd:enable"
+        await asyncio.sleep(1)
+        return b""
+
+    async_cam.reader = MagicMock()
+    async_cam.reader.read = read
+    replies = await async_cam.send_batch([[("cmd", "enable")]] * 3, timeout=0.0005)
+
+    assert replies == [OrderedDict([("cmd", "enable")])] * 2 + [OrderedDict()]
+    assert async_cam.writer.write.call_count == 2
+    assert async_cam.flow_control.congestion_events == 1
+
+
+async def test_scheduler_uses_window():
+    """Test that the scheduler uses the flow control window."""
+    cam = MagicMock()
+    cam.flow_control = FlowControl(initial=3)
+    scheduler = CommandScheduler(cam, max_in_flight=1)
+
+    assert scheduler.window == 3
@@ -0,0 +1,43 @@
+"""Tests for package import."""
+
+import subprocess
+import sys
+
+import pytest
+
+import leicacam
+
+HEAVY_MODULES = ("asyncio", "pydebug", "platform", "xml.etree.ElementTree")
+
+
+def _imported_modules(code):
+    """Return the heavy modules imported by code in a new interpreter."""
+    check = (
+        f"{code}; import sys; "
+        f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    )
+    result = subprocess.run(  # noqa: S603
+        [sys.executable, "-c", check],
+        capture_output=True,
+        check=True,
+        env={"PYTHONPATH": ":".join(sys.path)},
+        text=True,
+    )
+    return {module for module in result.stdout.strip().split(",") if module}
+
+
+def test_import_is_lazy():
+    """Test that importing the package does not import heavy modules."""
+    assert _imported_modules("import leicacam") == set()
+    assert _imported_modules("from leicacam import CAM") == set()
+    assert "asyncio" in _imported_modules("from leicacam import AsyncCAM")
+
+
+def test_lazy_attributes():
+    """Test that public classes are imported on access."""
+    from leicacam.cam import CAM
+
+    assert leicacam.CAM is CAM
+    assert "ThreadedCAM" in dir(leicacam)
+    with pytest.raises(AttributeError, match="no attribute 'missing'"):
+        leicacam.missing  # noqa: B018
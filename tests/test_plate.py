@@ -0,0 +1,90 @@
+"""Tests for plate module."""
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from leicacam.plate import PlateGeometry, parse_well, well_name  # noqa: E402
+
+
+def test_well_names():
+    """Test converting between well names and indices."""
+    assert parse_well("A1") == (1, 1)
+    assert parse_well(" b3 ") == (3, 2)
+    assert parse_well("AF48") == (48, 32)
+    assert well_name(3, 2) == "B3"
+    assert well_name(48, 32) == "AF48"
+    assert well_name(1, 26) == "Z1"
+    with pytest.raises(ValueError, match="Invalid well name"):
+        parse_well("3B")
+    with pytest.raises(ValueError, match="Invalid well"):
+        well_name(0, 1)
+
+
+def test_standard_plates():
+    """Test standard plate formats."""
+    plate = PlateGeometry.from_wells(1536)
+    wells = plate.wells()
+
+    assert wells.shape == (1536, 2)
+    assert plate.well_names()[-1] == "AF48"
+    assert plate.well_names(wells[:2]) == ["A1", "A2"]
+    assert "columns=48" in repr(plate)
+    with pytest.raises(ValueError, match="Unknown plate format"):
+        PlateGeometry.from_wells(100)
+
+
+def test_field_indices():
+    """Test listing all fields of wells."""
+    plate = PlateGeometry.from_wells(96, fields=(2, 3))
+
+    indices = plate.field_indices(["B3", (12, 8)])
+    assert indices.shape == (12, 4)
+    assert indices[:3].tolist() == [[3, 2, 1, 1], [3, 2, 2, 1], [3, 2, 1, 2]]
+    assert indices[-1].tolist() == [12, 8, 2, 3]
+    assert plate.field_indices().shape == (96 * 6, 4)
+    with pytest.raises(ValueError, match="outside"):
+        plate.wells(["I1"])
+
+
+def test_stage_round_trip():
+    """Test mapping indices to stage positions and back."""
+    plate = PlateGeometry.from_wells(
+        384, fields=(3, 2), field_distance=(400, 300), start=(1000, 2000)
+    )
+    indices = plate.field_indices()
+    positions = plate.to_stage(indices)
+
+    assert positions[0].tolist() == [1000, 2000]
+    assert plate.to_stage([2, 3, 3, 2]).tolist() == [[6300, 11300]]
+    np.testing.assert_array_equal(plate.from_stage(positions), indices)
+    np.testing.assert_array_equal(plate.from_stage(positions + 50), indices)
+    assert plate.from_stage([-1e6, 1e6]).tolist() == [[1, 16, 1, 2]]
+
+
+def test_from_stage_single_field():
+    """Test mapping positions without field distance."""
+    plate = PlateGeometry()
+    assert plate.from_stage([[9100, 17900]]).tolist() == [[2, 3, 1, 1]]
+
+
+def test_commands():
+    """Test enable and position commands."""
+    plate = PlateGeometry.from_wells(96, fields=(2, 1), field_distance=(500, 0))
+    indices = plate.field_indices(["A2"])
+
+    assert plate.enable_commands(indices, value=False) == [
+        [
+            ("cmd", "enable"),
+            ("slide", "0"),
+            ("wellx", "2"),
+            ("welly", "1"),
+            ("fieldx", str(field_x)),
+            ("fieldy", "1"),
+            ("value", "false"),
+        ]
+        for field_x in (1, 2)
+    ]
+    commands = plate.position_commands(plate.to_stage(indices))
+    assert commands[1][0] == ("cmd", "setposition")
+    assert commands[1][-2:] == [("xpos", "9500.000"), ("ypos", "0.000")]
@@ -0,0 +1,126 @@
+"""Tests for progress module."""
+
+import asyncio
+from unittest.mock import patch
+
+from leicacam.async_cam import AsyncCAM
+from leicacam.deadline import Deadline
+from leicacam.progress import FINISHED, RUNNING, Progress, ProgressTracker
+
+WELCOME = b"/app:matrix /welcome:hello\r\n"
+
+
+def _image(well_x, well_y, field_x, field_y, job=1):
+    """Return an image event message."""
+    return {
+        "relpath": (
+            f"subfolder/image--L0000--S00--U{well_x:02}--V{well_y:02}"
+            f"--J{job:02}--E00--O00--X{field_x:02}--Y{field_y:02}--T0000"
+            "--Z00--C00.ome.tif"
+        )
+    }
+
+
+def test_image_events():
+    """Test that image events update position, count, rate and ETA."""
+    snapshots = []
+    tracker = ProgressTracker(total=4, callback=snapshots.append)
+    with patch("leicacam.progress.monotonic", side_effect=[10, 12, 14]):
+        assert tracker.update(_image(0, 0, 0, 0))
+        assert tracker.rate is None
+        assert tracker.update(_image(0, 0, 1, 0, job=2))
+        assert tracker.update(_image(1, 0, 0, 1))
+
+    progress = tracker.snapshot()
+    assert progress == Progress(
+        status=RUNNING,
+        well=(1, 0),
+        field=(0, 1),
+        job=1,
+        completed=3,
+        total=4,
+        rate=0.5,
+        eta=2.0,
+        last_image=_image(1, 0, 0, 1)["relpath"],
+    )
+    assert snapshots[-1] == progress
+    assert len(snapshots) == 3
+    assert not tracker.finished
+
+    tracker.update({"relpath": "other.tif"})
+    assert tracker.finished
+    assert tracker.well == (1, 0)
+
+
+def test_status_updates():
+    """Test scan events and scan status replies update the status."""
+    tracker = ProgressTracker()
+    assert tracker.next_poll(60) == 0
+    assert not tracker.update({"cmd": "startscan"})
+    assert tracker.update({"cmd": "getinfo", "dev": "scanstatus", "status": "paused"})
+    assert tracker.status == "paused"
+    assert 59 < tracker.next_poll(60) <= 60
+
+    assert tracker.update_all([{"cmd": "startscan"}, {"inf": "scanfinished"}])
+    assert tracker.status == FINISHED
+    assert tracker.finished
+    assert tracker.eta is None
+
+
+async def test_track():
+    """Test tracking progress from a server with infrequent polls."""
+    received = []
+
+    async def handle(reader, writer):
+        """Reply to polls and send events."""
+        writer.write(WELCOME)
+        await writer.drain()
+        data = await reader.read(1024)
+        received.append(data)
+        writer.write(b"/cmd:getinfo /dev:scanstatus /status:running\r\n")
+        await writer.drain()
+        for index in range(2):
+            await asyncio.sleep(0.01)
+            writer.write(b"/relpath:image--U00--V00--X%02d--Y00.tif\r\n" % index)
+            await writer.drain()
+        await asyncio.sleep(0.01)
+        writer.write(b"/inf:scanfinished\r\n")
+        await writer.drain()
+        await reader.read(1024)
+        writer.close()
+
+    server = await asyncio.start_server(handle, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    async with server, AsyncCAM(port=port) as cam:
+        progress = await ProgressTracker().track(cam, poll_interval=10)
+
+    assert progress.status == FINISHED
+    assert progress.completed == 2
+    assert progress.field == (1, 0)
+    assert len(received) == 1
+    assert b"/cmd:getinfo /dev:scanstatus" in received[0]
+
+
+async def test_track_deadline_and_eof():
+    """Test that tracking stops at the deadline and at end of stream."""
+
+    async def handle(reader, writer):
+        """Send welcome and close after the first poll."""
+        writer.write(WELCOME)
+        await writer.drain()
+        await reader.read(1024)
+        await asyncio.sleep(0.05)
+        writer.close()
+
+    server = await asyncio.start_server(handle, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    async with server:
+        async with AsyncCAM(port=port) as cam:
+            progress = await ProgressTracker().track(
+                cam, poll_interval=0.01, deadline=Deadline(0.02)
+            )
+            assert progress.status is None
+
+        async with AsyncCAM(port=port) as cam:
+            progress = await ProgressTracker().track(cam, poll_interval=10)
+            assert progress.completed == 0
@@ -0,0 +1,108 @@
+"""Tests for records module."""
+
+from collections import OrderedDict
+
+import pytest
+
+from leicacam.records import (
+    EnableReply,
+    ImageEvent,
+    Response,
+    ScanStatusInfo,
+    StageInfo,
+    ZDriveInfo,
+    as_record,
+    parse_records,
+)
+
+
+def test_stage_info():
+    """Test stage info fields are converted on access."""
+    record = as_record(OrderedDict([("dev", "stage"), ("xpos", "0.5"), ("ypos", "1")]))
+
+    assert isinstance(record, StageInfo)
+    assert not hasattr(record, "__dict__")
+    assert record.x == 0.5
+    assert record.y == 1.0
+    assert record["xpos"] == "0.5"
+
+
+def test_lazy_conversion_cached():
+    """Test that a field is converted only once."""
+    record = StageInfo({"xpos": "0.5"})
+    assert record.x == 0.5
+    record.raw["xpos"] = "2"
+    assert record.x == 0.5
+
+
+def test_missing_field():
+    """Test that a missing field is None."""
+    record = ZDriveInfo({"dev": "zdrive"})
+    assert record.z is None
+    assert as_record({"dev": "zdrive", "zpos": "3.5"}).z == 3.5
+
+
+def test_scan_status():
+    """Test scan status record."""
+    record = as_record({"dev": "scanstatus", "status": "running"})
+    assert isinstance(record, ScanStatusInfo)
+    assert record.status == "running"
+
+
+def test_enable_reply():
+    """Test enable reply record."""
+    record = as_record(
+        {
+            "cmd": "enable",
+            "slide": "0",
+            "wellx": "2",
+            "welly": "3",
+            "fieldx": "4",
+            "fieldy": "5",
+            "value": "false",
+        }
+    )
+    assert isinstance(record, EnableReply)
+    assert (record.slide, record.wellx, record.welly) == (0, 2, 3)
+    assert (record.fieldx, record.fieldy) == (4, 5)
+    assert record.value is False
+
+
+def test_image_event():
+    """Test image event attributes from image path."""
+    relpath = (
+        "subfolder\\image--L0000--S00--U01--V02--J08--E00--O00"
+        "--X03--Y04--T0005--Z06--C01.ome.tif"
+    )
+    record = as_record({"relpath": relpath})
+
+    assert isinstance(record, ImageEvent)
+    assert record.relpath == relpath
+    assert (record.well_x, record.well_y) == (1, 2)
+    assert (record.field_x, record.field_y) == (3, 4)
+    assert (record.job, record.time, record.z, record.channel) == (8, 5, 6, 1)
+    assert as_record({"relpath": "image.tif"}).well_x is None
+
+
+def test_response_mapping():
+    """Test that a record behaves as a mapping."""
+    msg = OrderedDict([("cmd", "startscan")])
+    record = as_record(msg)
+
+    assert type(record) is Response
+    assert record == msg
+    assert record == Response(msg)
+    assert record != 1
+    assert dict(record) == msg
+    assert len(record) == 1
+    assert record.as_dict() == msg
+    assert hash(record) == hash(Response(msg))
+    assert repr(record) == "Response({'cmd': 'startscan'})"
+    with pytest.raises(KeyError):
+        record["dev"]
+
+
+def test_parse_records():
+    """Test parsing received bytes to records."""
+    records = parse_records(b"/dev:stage /xpos:1\x00/cmd:startscan\r\n")
+    assert [type(record) for record in records] == [StageInfo, Response]
@@ -0,0 +1,138 @@
+"""Tests for scheduler module."""
+
+import asyncio
+from collections import OrderedDict
+from time import monotonic
+
+import pytest
+
+from leicacam.scheduler import CommandScheduler, Lane, command_lane
+
+
+class FakeCAM:
+    """Fake AsyncCAM that replies to sent commands when told to."""
+
+    delay = 0.01
+    flow_control = None
+
+    def __init__(self, auto_reply=True):
+        """Set up instance."""
+        self.auto_reply = auto_reply
+        self.sent = []
+        self.incoming = asyncio.Queue()
+
+    async def send(self, commands):
+        """Record sent commands and reply if auto reply."""
+        self.sent.append(commands)
+        if self.auto_reply:
+            self.reply(commands)
+
+    def reply(self, commands):
+        """Queue a reply to commands."""
+        self.incoming.put_nowait([OrderedDict(commands)])
+
+    async def receive(self):
+        """Return received messages."""
+        return await self.incoming.get()
+
+
+def test_command_lane():
+    """Test default lanes of commands."""
+    assert command_lane([("cmd", "stopscan")]) == Lane.CONTROL
+    assert command_lane([("cmd", "enable"), ("value", "true")]) == Lane.BULK
+    assert command_lane([("cmd", "getinfo")]) == Lane.NORMAL
+
+
+async def test_send():
+    """Test sending a command and receiving the reply."""
+    cam = FakeCAM()
+    async with CommandScheduler(cam) as scheduler:
+        reply = await scheduler.send([("cmd", "startscan")])
+
+    assert reply == OrderedDict([("cmd", "startscan")])
+
+
+async def test_control_jumps_ahead():
+    """Test that control commands are sent ahead of queued bulk commands."""
+    cam = FakeCAM(auto_reply=False)
+    async with CommandScheduler(cam, max_in_flight=1) as scheduler:
+        futures = [
+            scheduler.submit([("cmd", "enable"), ("wellx", str(num))])
+            for num in range(3)
+        ]
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+        stop = scheduler.submit([("cmd", "stopscan")])
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+        assert [dict(cmd)["cmd"] for cmd in cam.sent] == ["enable", "stopscan"]
+        assert scheduler.in_flight == 1
+        assert scheduler.queued == 2
+
+        cam.reply([("cmd", "stopscan")])
+        assert await stop == {"cmd": "stopscan"}
+        cam.auto_reply = True
+        cam.reply([("cmd", "enable")])
+        await asyncio.gather(*futures)
+
+    assert len(cam.sent) == 4
+
+
+async def test_rate_limit():
+    """Test that a lane rate limit spaces the commands."""
+    cam = FakeCAM()
+    async with CommandScheduler(cam, rate_limits={Lane.BULK: 50}) as scheduler:
+        start = monotonic()
+        await asyncio.gather(
+            *(scheduler.send([("cmd", "enable")]) for _ in range(4)),
+            scheduler.send([("cmd", "getinfo")]),
+        )
+
+    assert monotonic() - start >= 0.06
+    assert dict(cam.sent[0])["cmd"] == "getinfo"
+
+
+async def test_timeout_frees_window():
+    """Test that a command without reply times out and frees the window."""
+    cam = FakeCAM(auto_reply=False)
+    async with CommandScheduler(cam, max_in_flight=1) as scheduler:
+        reply = await scheduler.send([("cmd", "getinfo")], timeout=0.001)
+        assert reply == OrderedDict()
+        assert scheduler.in_flight == 0
+        queued = scheduler.submit([("cmd", "enable")], lane=Lane.NORMAL)
+        queued.cancel()
+        cam.auto_reply = True
+        assert await scheduler.send([("cmd", "startscan")]) == {"cmd": "startscan"}
+
+
+async def test_events_and_stop():
+    """Test unsolicited messages and stopping with pending commands."""
+    events = []
+    cam = FakeCAM(auto_reply=False)
+    scheduler = CommandScheduler(cam, max_in_flight=1, event_callback=events.append)
+    scheduler.start()
+    sent = scheduler.submit([("cmd", "getinfo")])
+    queued = scheduler.submit([("cmd", "enable")])
+    cam.incoming.put_nowait([])
+    cam.reply([("relpath", "image.tif")])
+    await asyncio.sleep(0.05)
+    await scheduler.stop()
+
+    assert events == [{"relpath": "image.tif"}]
+    assert sent.cancelled()
+    assert queued.cancelled()
+
+
+async def test_send_error():
+    """Test that a send error is set on the future."""
+    cam = FakeCAM()
+
+    async def send(commands):
+        """Raise a connection error."""
+        raise ConnectionResetError
+
+    cam.send = send
+    async with CommandScheduler(cam) as scheduler:
+        with pytest.raises(ConnectionResetError):
+            await scheduler.send([("cmd", "startscan")])
+        assert scheduler.in_flight == 0
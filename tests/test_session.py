@@ -0,0 +1,142 @@
+"""Tests for session module."""
+
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from leicacam.async_cam import AsyncCAM
+from leicacam.cam import CAM
+from leicacam.session import (
+    _HEADER,
+    RECEIVED,
+    SENT,
+    RecordingSocket,
+    ReplayServer,
+    SessionRecorder,
+    main,
+    read_session,
+)
+
+WELCOME = b"/app:matrix /welcome:hello\r\n"
+
+
+@pytest.fixture(name="session_path")
+def session_path_fixture(tmp_path):
+    """Return path to a recorded session."""
+    path = str(tmp_path / "session.cam")
+    with SessionRecorder(path) as recorder:
+        recorder.record(RECEIVED, WELCOME)
+        recorder.record(SENT, b"/cli:python-leicacam /app:matrix /cmd:startscan")
+        recorder.record(RECEIVED, b"/cmd:startscan\r\n")
+    return path
+
+
+def test_read_session(session_path):
+    """Test reading the recorded events."""
+    events = list(read_session(session_path))
+
+    assert [event.direction for event in events] == [RECEIVED, SENT, RECEIVED]
+    assert events[0].data == WELCOME
+    assert events[0].timestamp <= events[2].timestamp
+
+
+def test_append_and_truncated(session_path):
+    """Test appending to a session and skipping a truncated record."""
+    recorder = SessionRecorder(session_path)
+    recorder.record(SENT, b"")
+    recorder.record(SENT, b"/cmd:stopscan")
+    recorder.close()
+    recorder.record(SENT, b"closed")
+    assert len(list(read_session(session_path))) == 4
+
+    with open(session_path, "ab") as session_file:
+        session_file.write(_HEADER.pack(1.0, SENT, 16) + b"short")
+    assert len(list(read_session(session_path))) == 4
+
+    with open(session_path, "ab") as session_file:
+        session_file.write(b"\x00" * 3)
+    assert len(list(read_session(session_path))) == 4
+
+
+def test_not_session_file(tmp_path):
+    """Test reading a file without magic header."""
+    path = tmp_path / "other"
+    path.write_bytes(b"other")
+    with pytest.raises(ValueError, match="Not a session file"):
+        list(read_session(str(path)))
+
+
+def test_cam_recording(tmp_path):
+    """Test that CAM records sent and received bytes."""
+    path = str(tmp_path / "session.cam")
+    mock_socket = MagicMock()
+    mock_socket.recv.return_value = WELCOME
+    mock_socket.send.side_effect = len
+    with (
+        patch("socket.socket", return_value=mock_socket),
+        SessionRecorder(path) as recorder,
+    ):
+        cam = CAM(recorder=recorder)
+        assert isinstance(cam.socket, RecordingSocket)
+        cam.flush = MagicMock()
+        cam.send([("cmd", "startscan")])
+        cam.socket.sendall(b"/cmd:stopscan")
+        cam.close()
+
+    assert mock_socket.close.call_count == 1
+    events = list(read_session(path))
+    assert [event.data for event in events] == [
+        WELCOME,
+        cam.prefix_bytes + b"/cmd:startscan",
+        b"/cmd:stopscan",
+    ]
+
+
+async def test_replay_async_cam(session_path, tmp_path):
+    """Test replaying a session to an AsyncCAM that records a new session."""
+    server = ReplayServer(session_path, port=0, speed=float("inf"))
+    await server.start()
+    path = str(tmp_path / "replayed.cam")
+    with SessionRecorder(path) as recorder:
+        cam = AsyncCAM(port=server.port, recorder=recorder)
+        await cam.connect()
+        assert cam.welcome_msg == WELCOME
+        await cam.send([("cmd", "startscan")])
+        response = await cam.wait_for("cmd", "startscan", timeout=0.1)
+        cam.close()
+    await server.close()
+
+    assert response == {"cmd": "startscan"}
+    assert server.mismatches == 0
+    assert [event.data for event in read_session(path)] == [
+        event.data for event in read_session(session_path)
+    ]
+
+
+async def test_replay_mismatch(session_path):
+    """Test replaying a session to a client sending other bytes."""
+    server = ReplayServer(session_path, port=0, speed=1000)
+    await server.start()
+    cam = AsyncCAM(port=server.port)
+    await cam.connect()
+    await cam.send([("cmd", "pausescan")])
+    await cam.receive()
+    cam.close()
+    await server.close()
+    await server.close()
+
+    assert server.mismatches == 1
+
+
+def test_replay_invalid_speed(session_path):
+    """Test that speed must be positive."""
+    with pytest.raises(ValueError, match="Speed must be positive"):
+        ReplayServer(session_path, speed=0)
+
+
+def test_main(session_path):
+    """Test the replay command line."""
+    with patch("leicacam.session.asyncio.run", side_effect=KeyboardInterrupt) as run:
+        main([session_path, "--port", "0", "--speed", "inf"])
+    run.call_args[0][0].close()
+    assert run.call_count == 1
@@ -0,0 +1,81 @@
+"""Tests for settings module."""
+
+from collections import OrderedDict
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from leicacam.cam import CAM
+from leicacam.settings import SettingsProfile
+
+
+def test_profile_replaces_setting():
+    """Test that a command for the same setting replaces the earlier one."""
+    profile = SettingsProfile(
+        [[("cmd", "adjust"), ("tar", "pmt"), ("num", 1), ("value", 600)]]
+    )
+    profile.set("adjust", tar="pmt", num=1, value=700)
+    profile.set("adjust", tar="pmt", num=2, value=700)
+
+    assert len(profile) == 2
+    assert profile.commands[0] == [
+        ("cmd", "adjust"),
+        ("tar", "pmt"),
+        ("num", "1"),
+        ("value", "700"),
+    ]
+
+
+def test_profile_not_settings_command():
+    """Test that only settings commands can be added."""
+    with pytest.raises(ValueError, match="Not a settings command"):
+        SettingsProfile().set("startscan")
+
+
+def test_profile_diff():
+    """Test diff only returns new and changed settings."""
+    previous = SettingsProfile().set("loop", count=2).set("pump", value="on")
+    profile = previous.copy().set("pump", value="off").set("barcode", value="x")
+
+    assert profile.diff(None) == profile.commands
+    assert profile.diff(previous) == [
+        [("cmd", "pump"), ("value", "off")],
+        [("cmd", "barcode"), ("value", "x")],
+    ]
+    assert previous.diff(previous) == []
+
+
+def test_profile_confirmed():
+    """Test that only confirmed commands are added to the profile."""
+    commands = [[("cmd", "loop"), ("count", "2")], [("cmd", "pump")]]
+    replies = [OrderedDict([("cmd", "loop")]), OrderedDict()]
+    profile = SettingsProfile().confirmed(commands, replies)
+
+    assert profile.commands == [commands[0]]
+
+
+def test_cam_apply_settings():
+    """Test applying a settings profile with CAM."""
+    mock_socket = MagicMock()
+    with patch("socket.socket", return_value=mock_socket):
+        cam = CAM()
+    cam.flush = MagicMock()
+    mock_socket.recv.side_effect = [
+        b"/cmd:loop /count:2\r\n/cmd:pump /value:on",
+        b"/cmd:pump /value:off",
+    ]
+    profile = SettingsProfile().set("loop", count=2).set("pump", value="on")
+
+    responses = cam.apply_settings(profile)
+
+    assert [response["cmd"] for response in responses] == ["loop", "pump"]
+    assert cam.settings_profile == profile
+
+    profile.set("pump", value="off")
+    responses = cam.apply_settings(profile)
+
+    assert mock_socket.sendall.call_args[0][0] == (
+        cam.prefix_bytes + b"/cmd:pump /value:off"
+    )
+    assert cam.settings_profile == profile
+    assert cam.apply_settings(profile) == []
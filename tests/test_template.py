@@ -0,0 +1,136 @@
+"""Tests for template module."""
+
+from collections import OrderedDict
+import os
+from unittest.mock import MagicMock
+
+import pytest
+
+from leicacam.template import ScanningTemplate, TemplateManager, template_name
+
+TEMPLATE_XML = """<?xml version="1.0"?>
+<ScanningTemplate>
+  <ScanFieldArray>
+    <ScanFieldData WellX="1" WellY="1" FieldX="1" FieldY="1"
+      FieldXCoordinate="0.01" FieldYCoordinate="0.02" Enabled="true" />
+    <ScanFieldData WellX="1" WellY="1" FieldX="2" FieldY="1"
+      FieldXCoordinate="0.011" FieldYCoordinate="0.02" Enabled="false" />
+    <ScanFieldData WellX="2" WellY="1" FieldX="1" FieldY="1"
+      FieldXCoordinate="0.019" FieldYCoordinate="0.02" Enabled="true" />
+  </ScanFieldArray>
+</ScanningTemplate>
+"""
+
+
+@pytest.fixture(name="template_dir")
+def template_dir_fixture(tmp_path):
+    """Return a directory with a scanning template."""
+    (tmp_path / "{ScanningTemplate}test.xml").write_text(TEMPLATE_XML)
+    (tmp_path / "other.txt").write_text("")
+    return tmp_path
+
+
+@pytest.fixture(name="cam")
+def cam_fixture():
+    """Return a mock CAM echoing the template name."""
+    cam = MagicMock()
+    cam.load_template.side_effect = lambda name: OrderedDict(
+        [("cmd", "load"), ("fil", name)]
+    )
+    cam.save_template.return_value = OrderedDict([("sys", "0")])
+    return cam
+
+
+def test_template_name():
+    """Test template name normalization."""
+    assert template_name("test") == "{ScanningTemplate}test"
+    assert template_name("test.xml") == "{ScanningTemplate}test"
+    assert template_name("/path/to/{ScanningTemplate}test.xml") == (
+        "{ScanningTemplate}test"
+    )
+
+
+def test_load_skips_loaded_template(cam):
+    """Test that loading the loaded template again is skipped."""
+    manager = TemplateManager(cam)
+    response = manager.load("test")
+    assert manager.load("{ScanningTemplate}test.xml") == response
+    assert cam.load_template.call_count == 1
+    assert manager.loaded == "{ScanningTemplate}test"
+    assert "{ScanningTemplate}test" in manager.known
+
+    manager.load("test", force=True)
+    assert cam.load_template.call_count == 2
+
+    manager.invalidate()
+    manager.load("test")
+    assert cam.load_template.call_count == 3
+
+
+def test_load_failed(cam):
+    """Test that a load without response is not remembered."""
+    cam.load_template.side_effect = None
+    cam.load_template.return_value = OrderedDict()
+    manager = TemplateManager(cam)
+    manager.load("test")
+    manager.load("test")
+
+    assert manager.loaded is None
+    assert cam.load_template.call_count == 2
+
+
+def test_save(cam):
+    """Test that saved templates are indexed."""
+    manager = TemplateManager(cam)
+    manager.save("new")
+
+    cam.save_template.assert_called_once_with("{ScanningTemplate}new.xml")
+    assert manager.known == {"{ScanningTemplate}new"}
+
+
+def test_index_and_parse(cam, template_dir):
+    """Test indexing and parsing templates from the template directory."""
+    manager = TemplateManager(cam, str(template_dir))
+    assert manager.known == {"{ScanningTemplate}test"}
+
+    with pytest.raises(RuntimeError, match="No template loaded"):
+        manager.template()
+
+    manager.load("test")
+    template = manager.template()
+
+    assert template.wells == [(1, 1), (2, 1)]
+    assert len(template.well_fields(1, 1)) == 2
+    field = template.field(1, 1, 2, 1)
+    assert field is not None
+    assert field.x == 0.011
+    assert not field.enabled
+    assert template.field(3, 3) is None
+    assert manager.template("test") is template
+
+
+def test_parse_cache_invalidated_on_change(cam, template_dir):
+    """Test that a changed template file is parsed again."""
+    manager = TemplateManager(cam, str(template_dir))
+    template = manager.template("test")
+    path = template_dir / "{ScanningTemplate}test.xml"
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+    assert manager.template("test") is not template
+
+
+def test_no_template_dir(cam):
+    """Test parsing without a template directory."""
+    manager = TemplateManager(cam)
+    assert manager.refresh_index() == set()
+    with pytest.raises(RuntimeError, match="No template directory"):
+        manager.template("test")
+
+
+def test_from_file(template_dir):
+    """Test parsing a template file."""
+    template = ScanningTemplate.from_file(
+        str(template_dir / "{ScanningTemplate}test.xml")
+    )
+    assert len(template.fields) == 3
@@ -0,0 +1,94 @@
+"""Tests for threaded module."""
+
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import threading
+from unittest.mock import MagicMock
+
+import pytest
+
+from leicacam.threaded import ThreadedCAM
+
+
+@pytest.fixture(name="cam")
+def cam_fixture():
+    """Return a mock CAM that replies with the sent commands."""
+    cam = MagicMock()
+    cam.batches = []
+    cam.thread_ids = set()
+
+    def send_batch(batch, timeout):
+        """Reply to each command."""
+        cam.batches.append(batch)
+        cam.thread_ids.add(threading.get_ident())
+        return [OrderedDict(commands) for commands in batch]
+
+    cam.send_batch.side_effect = send_batch
+    return cam
+
+
+def test_submit_from_threads(cam):
+    """Test that commands from many threads get their own reply."""
+    with ThreadedCAM(cam) as threaded_cam:
+        with ThreadPoolExecutor(8) as executor:
+            replies = list(
+                executor.map(
+                    lambda num: threaded_cam.send([("cmd", "getinfo"), ("num", num)]),
+                    range(100),
+                )
+            )
+
+    assert [reply["num"] for reply in replies] == list(range(100))
+    assert sum(len(batch) for batch in cam.batches) == 100
+    assert cam.thread_ids == {threaded_cam._thread.ident}
+    assert cam.close.call_count == 1
+
+
+def test_commands_batched(cam):
+    """Test that queued commands are sent in batches."""
+    started = threading.Event()
+    release = threading.Event()
+
+    def send_batch(batch, timeout):
+        """Block the first batch until released."""
+        if not started.is_set():
+            started.set()
+            release.wait()
+        return [OrderedDict(commands) for commands in batch]
+
+    cam.send_batch.side_effect = send_batch
+    threaded_cam = ThreadedCAM(cam, max_batch=3)
+    first = threaded_cam.submit([("cmd", "startscan")])
+    started.wait()
+    futures = [threaded_cam.submit([("cmd", "enable")]) for _ in range(4)]
+    release.set()
+    threaded_cam.close()
+
+    assert first.result() == {"cmd": "startscan"}
+    assert [future.result() for future in futures] == [{"cmd": "enable"}] * 4
+    assert [len(call.args[0]) for call in cam.send_batch.call_args_list] == [1, 3, 1]
+
+
+def test_cancelled_and_error(cam):
+    """Test that cancelled commands are skipped and errors are set."""
+    release = threading.Event()
+    error = OSError("broken")
+
+    def send_batch(batch, timeout):
+        """Wait for release and raise."""
+        release.wait()
+        raise error
+
+    cam.send_batch.side_effect = send_batch
+    threaded_cam = ThreadedCAM(cam)
+    first = threaded_cam.submit([("cmd", "startscan")])
+    cancelled = threaded_cam.submit([("cmd", "stopscan")])
+    assert cancelled.cancel()
+    release.set()
+    threaded_cam.close()
+    threaded_cam.close()
+
+    assert first.exception() is error
+    assert cam.send_batch.call_count == 1
+    with pytest.raises(RuntimeError, match="closed"):
+        threaded_cam.submit([("cmd", "startscan")])